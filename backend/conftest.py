@@ -0,0 +1,14 @@
+"""
+Import paths for the test suite, set once per session
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+REPO_ROOT = BACKEND_DIR.parent
+
+# Repo root for `backend.*` / `scripts.*` imports, backend/ and scripts/ for flat imports
+for path in (REPO_ROOT, BACKEND_DIR, REPO_ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -1,21 +1,65 @@
+import asyncio
+import hashlib
+import os
 import sqlite3
+import threading
+from cachetools import TTLCache
 from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import Filter, FieldCondition, MatchValue, QueryRequest
+from sentence_transformers import CrossEncoder, SentenceTransformer
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import numpy as np
-import math
-from collections import Counter
+from functools import lru_cache
+
+from onnx_encoder import load_onnx_encoder
+
+try:
+    import bm25s
+
+    BM25S_AVAILABLE = True
+except ImportError:
+    BM25S_AVAILABLE = False
 
 
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
 
 
+def get_ingestion_marker_path():
+    # Touched by scripts/embed_chunks.py when an ingestion run finishes
+    return Path(__file__).parent.parent / "data" / "metadata" / "last_ingestion"
+
+
+def _ingestion_version() -> Optional[int]:
+    try:
+        return os.stat(get_ingestion_marker_path()).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_QDRANT: Optional[QdrantClient] = None
+_QDRANT_LOCK = threading.Lock()
+_DB_LOCAL = threading.local()
+
+
 def get_qdrant_client():
-    client = QdrantClient(path=str(Path(__file__).parent.parent / "data" / "qdrant_collection"))
-    return client
+    # The embedded path-mode store is single-process, so every retriever shares one handle
+    global _QDRANT
+    with _QDRANT_LOCK:
+        if _QDRANT is None:
+            _QDRANT = QdrantClient(
+                path=str(Path(__file__).parent.parent / "data" / "qdrant_collection")
+            )
+        return _QDRANT
+
+
+def get_connection() -> sqlite3.Connection:
+    conn = getattr(_DB_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(get_db_path())
+        _DB_LOCAL.conn = conn
+    return conn
 
 
 def log_event(conn, document_id: str, level: str, message: str):
@@ -29,72 +73,226 @@ def log_event(conn, document_id: str, level: str, message: str):
 
 class BM25Index:
     def __init__(self):
-        self.documents = {}
-        self.idf = {}
-        self.doc_lengths = {}
+        self.vocab: Dict[str, int] = {}
+        self.cid_to_idx: Dict[str, int] = {}
+        # CSR postings: term t owns post_docs[term_ptr[t]:term_ptr[t + 1]] (and post_tfs)
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.post_tfs = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float64)
+        self.idf_times_k1p1 = np.zeros(0, dtype=np.float64)
+        self.dl_arr = np.zeros(0, dtype=np.float32)
+        self.norm_inv_arr = np.zeros(0, dtype=np.float32)
         self.avg_doc_length = 0
         self.k1 = 1.5
         self.b = 0.75
 
     def build_index(self, chunks: List[Tuple]):
-        self.documents = {}
-        term_doc_freq = {}
+        self.cid_to_idx = {}
+        self.vocab = {}
+        doc_term_ids = []
 
-        for chunk_id, text in chunks:
+        for idx, (chunk_id, text) in enumerate(chunks):
             tokens = text.lower().split()
-            self.documents[chunk_id] = tokens
-            self.doc_lengths[chunk_id] = len(tokens)
+            self.cid_to_idx[chunk_id] = idx
+            doc_term_ids.append(
+                np.fromiter(
+                    (self.vocab.setdefault(token, len(self.vocab)) for token in tokens),
+                    dtype=np.int32,
+                    count=len(tokens),
+                )
+            )
 
-            term_counts = Counter(tokens)
-            for term in term_counts:
-                if term not in term_doc_freq:
-                    term_doc_freq[term] = 0
-                term_doc_freq[term] += 1
+        unique_ids, unique_counts = [], []
+        for ids in doc_term_ids:
+            terms, counts = np.unique(ids, return_counts=True)
+            unique_ids.append(terms)
+            unique_counts.append(counts)
+
+        N = len(doc_term_ids)
+        V = len(self.vocab)
+        term_ids = np.concatenate(unique_ids) if N else np.zeros(0, dtype=np.int32)
+        term_freqs = np.concatenate(unique_counts) if N else np.zeros(0, dtype=np.int64)
+        doc_idx = np.repeat(np.arange(N, dtype=np.int32), [len(terms) for terms in unique_ids])
+
+        doc_freq = np.bincount(term_ids, minlength=V)
+
+        # Regroup the (doc, term) pairs by term; stable keeps doc ids ascending in each posting
+        order = np.argsort(term_ids, kind="stable")
+        self.post_docs = doc_idx[order]
+        self.post_tfs = term_freqs[order].astype(np.float32)
+        self.term_ptr = np.zeros(V + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.term_ptr[1:])
+
+        self.dl_arr = np.array([len(ids) for ids in doc_term_ids], dtype=np.float32)
+        if len(self.dl_arr):
+            self.avg_doc_length = float(self.dl_arr.mean())
+
+        self.idf = np.log((N - doc_freq + 0.5) / (doc_freq + 0.5) + 1)
+        self.idf_times_k1p1 = self.idf * (self.k1 + 1)
+
+        # Lucene-style: fold the length normalization into one reciprocal per doc
+        self.norm_inv_arr = 1.0 / (
+            self.k1 * ((1 - self.b) + self.b * self.dl_arr / self.avg_doc_length)
+        )
+
+    def score_all(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.dl_arr), dtype=np.float32)
+
+        for term in query.lower().split():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            ids = self.post_docs[start:end]
+            tfs = self.post_tfs[start:end]
+            weight = self.idf_times_k1p1[term_id]
+            scores[ids] += weight - weight / (1 + tfs * self.norm_inv_arr[ids])
 
-        if self.doc_lengths:
-            self.avg_doc_length = sum(self.doc_lengths.values()) / len(self.doc_lengths)
+        return scores
 
-        N = len(self.documents)
+    def score(self, chunk_id: str, query: str) -> float:
+        return self.batch_score(query, [chunk_id])[chunk_id]
 
-        for term, doc_freq in term_doc_freq.items():
-            self.idf[term] = math.log((N - doc_freq + 0.5) / (doc_freq + 0.5) + 1)
+    def select_scores(self, scores: np.ndarray, chunk_ids: List[str]) -> Dict[str, float]:
+        return {
+            chunk_id: (
+                float(scores[self.cid_to_idx[chunk_id]]) if chunk_id in self.cid_to_idx else 0.0
+            )
+            for chunk_id in chunk_ids
+        }
 
-    def score(self, chunk_id: str, query: str) -> float:
-        if chunk_id not in self.documents:
-            return 0.0
+    def batch_score(self, query: str, chunk_ids: List[str]) -> Dict[str, float]:
+        return self.select_scores(self.score_all(query), chunk_ids)
 
-        tokens = self.documents[chunk_id]
-        query_tokens = query.lower().split()
 
-        score = 0.0
-        doc_length = self.doc_lengths[chunk_id]
+class SparseBM25Index:
+    """BM25 backed by bm25s, which precomputes every term/doc score into a sparse matrix."""
 
-        for term in query_tokens:
-            if term in tokens and term in self.idf:
-                term_freq = tokens.count(term)
-                numerator = self.idf[term] * term_freq * (self.k1 + 1)
-                denominator = term_freq + self.k1 * (
-                    1 - self.b + self.b * (doc_length / self.avg_doc_length)
-                )
-                score += numerator / denominator
+    def __init__(self):
+        self.k1 = 1.5
+        self.b = 0.75
+        self.bm25 = None
+        self.chunk_ids: List[str] = []
+        self.chunk_index: Dict[str, int] = {}
+
+    def build_index(self, chunks: List[Tuple]):
+        self.chunk_ids = [chunk_id for chunk_id, _ in chunks]
+        self.chunk_index = {chunk_id: i for i, chunk_id in enumerate(self.chunk_ids)}
+
+        # Same whitespace tokenization as BM25Index so scores stay comparable
+        corpus_tokens = [text.lower().split() for _, text in chunks]
+
+        self.bm25 = bm25s.BM25(k1=self.k1, b=self.b)
+        self.bm25.index(corpus_tokens, show_progress=False)
 
-        return score
+    def score_all(self, query: str) -> np.ndarray:
+        query_tokens = [t for t in query.lower().split() if t in self.bm25.vocab_dict]
+        if not query_tokens:
+            return np.zeros(len(self.chunk_ids), dtype=np.float32)
+
+        return self.bm25.get_scores(query_tokens)
+
+    def select_scores(self, scores: np.ndarray, chunk_ids: List[str]) -> Dict[str, float]:
+        return {
+            chunk_id: (
+                float(scores[self.chunk_index[chunk_id]]) if chunk_id in self.chunk_index else 0.0
+            )
+            for chunk_id in chunk_ids
+        }
 
     def batch_score(self, query: str, chunk_ids: List[str]) -> Dict[str, float]:
-        scores = {}
-        for chunk_id in chunk_ids:
-            scores[chunk_id] = self.score(chunk_id, query)
-        return scores
+        return self.select_scores(self.score_all(query), chunk_ids)
+
+
+def load_semantic_model():
+    if os.environ.get("EMBEDDING_BACKEND", "torch").lower() == "onnx":
+        return load_onnx_encoder()
+
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+
+class Reranker:
+    """Cross-encoder rescoring of (query, chunk text) pairs, cached per pair for 15 minutes.
+
+    With onnx_dir set, runs an INT8 ONNX export (model_quantized.onnx) through ONNX Runtime.
+    """
+
+    def __init__(self, model_name: str, onnx_dir: Optional[str] = None):
+        self.cross_encoder = None
+        if onnx_dir:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            from transformers import AutoTokenizer
+
+            self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+            self.model = ORTModelForSequenceClassification.from_pretrained(
+                onnx_dir, file_name="model_quantized.onnx"
+            )
+        else:
+            self.cross_encoder = CrossEncoder(model_name, max_length=512)
+
+        self._scores: TTLCache = TTLCache(maxsize=8192, ttl=900)
+        # aretrieve reranks in worker threads and TTLCache is not thread-safe
+        self._scores_lock = threading.Lock()
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        if self.cross_encoder is not None:
+            return np.asarray(self.cross_encoder.predict(pairs, batch_size=32), dtype=np.float32)
+
+        inputs = self.tokenizer(
+            [query for query, _ in pairs],
+            [text for _, text in pairs],
+            padding=True,
+            truncation=True,
+            max_length=512,
+            return_tensors="np",
+        )
+        return self.model(**inputs).logits[:, 0].astype(np.float32)
+
+    def score(self, query: str, chunk_ids: List[str], texts: List[str]) -> np.ndarray:
+        query_key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+        keys = [(query_key, chunk_id) for chunk_id in chunk_ids]
+
+        # Scores are collected locally, so entries expiring or evicted meanwhile do no harm
+        with self._scores_lock:
+            scores = {key: self._scores.get(key) for key in keys}
+        missing = [i for i, key in enumerate(keys) if scores[key] is None]
+        if missing:
+            # The model runs outside the lock; concurrent misses may score a pair twice
+            new_scores = self._predict([(query, texts[i]) for i in missing])
+            with self._scores_lock:
+                for i, new_score in zip(missing, new_scores, strict=True):
+                    scores[keys[i]] = self._scores[keys[i]] = float(new_score)
+
+        return np.array([scores[key] for key in keys], dtype=np.float32)
+
+
+def load_reranker() -> Optional[Reranker]:
+    model_name = os.environ.get("RERANKER_MODEL")
+    if not model_name:
+        return None
+
+    return Reranker(model_name, onnx_dir=os.environ.get("RERANKER_ONNX_DIR"))
+
+
+def _copy_results(results: List[Dict]) -> List[Dict]:
+    # Cached lists are shared across requests; callers get their own list and dicts
+    return [dict(result) for result in results]
 
 
 class HybridRetriever:
-    def __init__(self):
+    def __init__(self, log_queue: Optional[List[Tuple]] = None):
+        # When set, log rows are appended here for a batched writer instead of committed inline
+        self.log_queue = log_queue
         self.qdrant_client = get_qdrant_client()
-        self.semantic_model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.bm25_index = BM25Index()
+        self.semantic_model = load_semantic_model()
         self.collection_name = "malaria_chunks"
         self.alpha = 0.7
         self.beta = 0.3
+        # Optional second stage: fuse K * oversample candidates, keep the top K by rerank
+        self.reranker = load_reranker()
+        self.rerank_oversample = 4
 
         self.section_boosts = {
             "results": 0.3,
@@ -105,17 +303,57 @@ class HybridRetriever:
             "full_text": 0.0,
         }
 
-        self._initialize()
+        self._embed_cached = lru_cache(maxsize=1024)(self._embed)
+        self._results_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+        self._refresh_lock = threading.Lock()
 
-    def _initialize(self):
-        conn = sqlite3.connect(get_db_path())
-        cursor = conn.cursor()
+        self._ingestion_version = _ingestion_version()
+        self.bm25_index = self._build_bm25_index()
+
+    def _build_bm25_index(self):
+        bm25_index = SparseBM25Index() if BM25S_AVAILABLE else BM25Index()
+
+        cursor = get_connection().cursor()
         cursor.execute("SELECT chunk_id, text FROM chunks")
         chunks = cursor.fetchall()
-        conn.close()
 
         if chunks:
-            self.bm25_index.build_index(chunks)
+            bm25_index.build_index(chunks)
+        return bm25_index
+
+    def refresh(self):
+        """Rebuild the BM25 index and drop cached results after new chunks are ingested."""
+        # Built aside and swapped in, so concurrent queries never see a partial index
+        self.bm25_index = self._build_bm25_index()
+        self._embed_cached.cache_clear()
+        self._results_cache.clear()
+
+    def _refresh_if_ingested(self):
+        # One stat per query; the marker moves only when an ingestion run completes
+        version = _ingestion_version()
+        if version == self._ingestion_version:
+            return
+
+        with self._refresh_lock:
+            if version != self._ingestion_version:
+                self.refresh()
+                self._ingestion_version = version
+
+    def _log(self, document_id: Optional[str], level: str, message: str):
+        if self.log_queue is not None:
+            self.log_queue.append((document_id, level, message))
+            return
+
+        log_event(get_connection(), document_id, level, message)
+
+    def _embed(self, query: str) -> bytes:
+        # Cached as immutable bytes so callers can't mutate a shared array
+        # Unit length, so scores match whether the collection uses DOT or COSINE
+        embedding = self.semantic_model.encode(query, normalize_embeddings=True)
+        return embedding.astype(np.float32).tobytes()
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        return np.frombuffer(self._embed_cached(query), dtype=np.float32)
 
     def _apply_filters(self, country: Optional[str] = None) -> Optional[Filter]:
         conditions = []
@@ -136,8 +374,11 @@ class HybridRetriever:
             with_payload=True,
         ).points
 
+        return self._to_semantic_results(search_results)
+
+    def _to_semantic_results(self, points) -> List[Dict]:
         results = []
-        for result in search_results:
+        for result in points:
             results.append(
                 {
                     "chunk_id": result.id,
@@ -148,24 +389,114 @@ class HybridRetriever:
 
         return results
 
-    def _normalize_scores(self, scores: Dict[str, float]) -> Dict[str, float]:
-        if not scores:
-            return {}
-
-        max_score = max(scores.values())
+    def _normalize_scores(self, scores: np.ndarray) -> np.ndarray:
+        max_score = scores.max() if len(scores) else 0.0
         if max_score == 0:
-            return {k: 0.0 for k in scores}
+            return np.zeros_like(scores)
 
-        return {k: v / max_score for k, v in scores.items()}
+        return scores / max_score
 
-    def _apply_section_boosts(self, results: List[Dict]) -> List[Dict]:
-        for result in results:
-            section = result.get("payload", {}).get("section", "")
-            boost = self.section_boosts.get(section, 0.0)
-            result["section_boost"] = boost
-            result["final_score"] = result["final_score"] + boost
+    def _rank(
+        self,
+        query: str,
+        semantic_results: List[Dict],
+        K: int,
+        corpus_bm25: Optional[np.ndarray] = None,
+        bm25_index=None,
+    ) -> List[Dict]:
+        chunk_ids = [r["chunk_id"] for r in semantic_results]
+
+        # corpus_bm25 is only meaningful against the index that produced it, which
+        # refresh() may have swapped out since
+        if bm25_index is None:
+            bm25_index = self.bm25_index
+        if corpus_bm25 is None:
+            corpus_bm25 = bm25_index.score_all(query)
+        bm25_scores = bm25_index.select_scores(corpus_bm25, chunk_ids)
+
+        semantic = self._normalize_scores(
+            np.array([r["score"] for r in semantic_results], dtype=np.float32)
+        )
+        bm25 = self._normalize_scores(
+            np.array([bm25_scores[chunk_id] for chunk_id in chunk_ids], dtype=np.float32)
+        )
+        sections = [r["payload"].get("section", "") for r in semantic_results]
+        boosts = np.array(
+            [self.section_boosts.get(section, 0.0) for section in sections], dtype=np.float32
+        )
+
+        final = self.alpha * semantic + self.beta * bm25 + boosts
+        # O(N) partition to the top K, then sort only those K
+        if K < len(final):
+            top = np.sort(np.argpartition(-final, K)[:K])
+        else:
+            top = np.arange(len(final))
+        order = top[np.argsort(-final[top], kind="stable")]
+
+        return [
+            {
+                "chunk_id": chunk_ids[i],
+                "semantic_score": float(semantic[i]),
+                "bm25_score": float(bm25[i]),
+                "final_score": float(final[i]),
+                "payload": semantic_results[i]["payload"],
+                "section_boost": float(boosts[i]),
+            }
+            for i in order
+        ]
+
+    def _candidate_count(self, K: int) -> int:
+        return K * self.rerank_oversample if self.reranker is not None else K
+
+    def _rerank(self, query: str, results: List[Dict], K: int) -> List[Dict]:
+        if self.reranker is None or not results:
+            return results[:K]
+
+        chunk_ids = [r["chunk_id"] for r in results]
+        texts = {r["chunk_id"]: r["payload"]["text"] for r in results if "text" in r["payload"]}
+
+        # Points embedded before chunk text was stored in the payload still need SQLite
+        missing_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in texts]
+        if missing_ids:
+            placeholders = ",".join("?" * len(missing_ids))
+            cursor = get_connection().execute(
+                f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})",
+                missing_ids,
+            )
+            texts.update(cursor.fetchall())
 
-        return results
+        scores = self.reranker.score(
+            query, chunk_ids, [texts.get(chunk_id, "") for chunk_id in chunk_ids]
+        )
+        order = np.argsort(-scores, kind="stable")[:K]
+
+        return [{**results[i], "rerank_score": float(scores[i])} for i in order]
+
+    def _log_results(self, query: str, country: Optional[str], K: int, results: List[Dict]):
+        filter_info = f"country={country}" if country else "none"
+
+        if not results:
+            message = f'Query: "{query[:100]}...", Filters: {filter_info}, Results: 0'
+            self._log(None, "WARNING", message)
+            return
+
+        scores_info = ", ".join(
+            [
+                f"semantic={r['semantic_score']:.3f}, "
+                f"bm25={r['bm25_score']:.3f}, "
+                f"final={r['final_score']:.3f}"
+                for r in results[:3]
+            ]
+        )
+
+        message = (
+            f'Query: "{query[:100]}...", '
+            f"Filters: {filter_info}, "
+            f"Retrieved: {len(results)}/{K} chunks, "
+            f"Top scores: [{scores_info}]"
+        )
+
+        self._log(results[0]["payload"]["document_id"], "INFO", message)
 
     def retrieve(
         self,
@@ -174,99 +505,157 @@ class HybridRetriever:
         K: int = 10,
         log_retrieval: bool = True,
     ) -> List[Dict]:
-        conn = sqlite3.connect(get_db_path())
+        self._refresh_if_ingested()
+
+        cache_key = (query, country, K)
+        cached = self._results_cache.get(cache_key)
+        if cached is not None:
+            return _copy_results(cached)
 
         try:
-            query_embedding = self.semantic_model.encode(query)
+            query_embedding = self._encode_query(query)
 
             filters = self._apply_filters(country)
 
-            semantic_results = self._semantic_search(query_embedding, filters, K * 2)
+            candidates = self._candidate_count(K)
+            semantic_results = self._semantic_search(query_embedding, filters, candidates * 2)
 
-            if not semantic_results:
-                if log_retrieval:
-                    filter_info = f"country={country}" if country else "none"
-                    message = f'Query: "{query[:100]}...", Filters: {filter_info}, Results: 0'
-                    log_event(conn, None, "WARNING", message)
-                conn.close()
-                return []
+            results = (
+                self._rank(query, semantic_results, candidates) if semantic_results else []
+            )
+            results = self._rerank(query, results, K)
 
-            chunk_ids = [r["chunk_id"] for r in semantic_results]
+            if log_retrieval:
+                self._log_results(query, country, K, results)
 
-            chunk_ids = [r["chunk_id"] for r in semantic_results]
+            if results:
+                self._results_cache[cache_key] = results
 
-            bm25_scores = self.bm25_index.batch_score(query, chunk_ids)
-            semantic_scores = {r["chunk_id"]: r["score"] for r in semantic_results}
+            return _copy_results(results)
 
-            normalized_semantic = self._normalize_scores(semantic_scores)
-            normalized_bm25 = self._normalize_scores(bm25_scores)
+        except Exception as e:
+            if log_retrieval:
+                self._log(None, "ERROR", f'Retrieval failed for query "{query[:100]}...": {str(e)}')
+            return []
 
-            results = []
-            for r in semantic_results:
-                chunk_id = r["chunk_id"]
-                semantic_score = normalized_semantic.get(chunk_id, 0.0)
-                bm25_score = normalized_bm25.get(chunk_id, 0.0)
+    async def aretrieve(
+        self,
+        query: str,
+        country: Optional[str] = None,
+        K: int = 10,
+        log_retrieval: bool = True,
+    ) -> List[Dict]:
+        """Async retrieve() that overlaps the Qdrant search with full-corpus BM25 scoring."""
+        if _ingestion_version() != self._ingestion_version:
+            # Rebuilding the BM25 index takes a while; keep it off the event loop
+            await asyncio.to_thread(self._refresh_if_ingested)
 
-                final_score = self.alpha * semantic_score + self.beta * bm25_score
+        cache_key = (query, country, K)
+        cached = self._results_cache.get(cache_key)
+        if cached is not None:
+            return _copy_results(cached)
 
-                result = {
-                    "chunk_id": chunk_id,
-                    "semantic_score": semantic_score,
-                    "bm25_score": bm25_score,
-                    "final_score": final_score,
-                    "payload": r["payload"],
-                }
-                results.append(result)
+        try:
+            filters = self._apply_filters(country)
+            candidates = self._candidate_count(K)
+
+            # BM25 over the whole corpus doesn't depend on the semantic candidates,
+            # so it runs while the embedding and Qdrant round-trip are in flight
+            bm25_index = self.bm25_index
+            semantic_results, corpus_bm25 = await asyncio.gather(
+                asyncio.to_thread(
+                    lambda: self._semantic_search(
+                        self._encode_query(query), filters, candidates * 2
+                    )
+                ),
+                asyncio.to_thread(bm25_index.score_all, query),
+            )
 
-            results.sort(key=lambda x: x["final_score"], reverse=True)
+            results = (
+                self._rank(query, semantic_results, candidates, corpus_bm25, bm25_index)
+                if semantic_results
+                else []
+            )
+            # The cross-encoder is CPU-heavy; keep it off the event loop as well
+            results = await asyncio.to_thread(self._rerank, query, results, K)
 
-            results = self._apply_section_boosts(results)
+            if log_retrieval:
+                self._log_results(query, country, K, results)
 
-            results.sort(key=lambda x: x["final_score"], reverse=True)
+            if results:
+                self._results_cache[cache_key] = results
 
-            results = results[:K]
+            return _copy_results(results)
 
+        except Exception as e:
             if log_retrieval:
-                filter_info = f"country={country}" if country else "none"
-                scores_info = ", ".join(
-                    [
-                        f"semantic={r['semantic_score']:.3f}, "
-                        f"bm25={r['bm25_score']:.3f}, "
-                        f"final={r['final_score']:.3f}"
-                        for r in results[:3]
-                    ]
-                )
+                self._log(None, "ERROR", f'Retrieval failed for query "{query[:100]}...": {str(e)}')
+            return []
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        country: Optional[str] = None,
+        K: int = 10,
+        log_retrieval: bool = True,
+    ) -> List[List[Dict]]:
+        """Retrieve for several queries with one encode call and one Qdrant round-trip."""
+        if not queries:
+            return []
+
+        try:
+            # encode() length-sorts the inputs so each batch pads to similar lengths
+            query_embeddings = self.semantic_model.encode(
+                queries, batch_size=32, convert_to_numpy=True, normalize_embeddings=True
+            )
 
-                message = (
-                    f'Query: "{query[:100]}...", '
-                    f"Filters: {filter_info}, "
-                    f"Retrieved: {len(results)}/{K} chunks, "
-                    f"Top scores: [{scores_info}]"
+            filters = self._apply_filters(country)
+            candidates = self._candidate_count(K)
+
+            # Same candidate pool as retrieve(): _semantic_search doubles its limit
+            requests = [
+                QueryRequest(
+                    query=embedding.tolist(),
+                    filter=filters,
+                    limit=candidates * 4,
+                    with_payload=True,
                 )
+                for embedding in query_embeddings
+            ]
+            responses = self.qdrant_client.query_batch_points(
+                collection_name=self.collection_name, requests=requests
+            )
 
-                log_event(
-                    conn,
-                    results[0]["payload"]["document_id"] if results else None,
-                    "INFO",
-                    message,
+            all_results = []
+            for query, response in zip(queries, responses, strict=True):
+                semantic_results = self._to_semantic_results(response.points)
+                results = (
+                    self._rank(query, semantic_results, candidates) if semantic_results else []
                 )
+                results = self._rerank(query, results, K)
+
+                if log_retrieval:
+                    self._log_results(query, country, K, results)
+
+                all_results.append(results)
 
-            return results
+            return all_results
 
         except Exception as e:
             if log_retrieval:
-                log_event(
-                    conn,
-                    None,
-                    "ERROR",
-                    f'Retrieval failed for query "{query[:100]}...": {str(e)}',
+                self._log(
+                    None, "ERROR", f"Batch retrieval failed for {len(queries)} queries: {str(e)}"
                 )
-            conn.close()
-            return []
+            return [[] for _ in queries]
+
+
+@lru_cache(maxsize=1)
+def get_retriever() -> HybridRetriever:
+    return HybridRetriever()
 
 
 def retrieve(query: str, country: Optional[str] = None, K: int = 10) -> List[Dict]:
-    retriever = HybridRetriever()
+    retriever = get_retriever()
     return retriever.retrieve(query, country=country, K=K)
 
 
@@ -282,12 +671,12 @@ if __name__ == "__main__":
         "drug resistance in Nigeria malaria cases",
     ]
 
-    for query in queries:
+    batch_results = get_retriever().retrieve_batch(queries, country=None, K=5)
+
+    for query, results in zip(queries, batch_results, strict=True):
         print(f"\nQuery: {query}")
         print("-" * 60)
 
-        results = retrieve(query, country=None, K=5)
-
         if results:
             print(f"Retrieved {len(results)} chunks:\n")
 
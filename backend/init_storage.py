@@ -20,7 +20,14 @@ def init_database():
 def init_qdrant():
     """Initialize Qdrant collection."""
     from qdrant_client import QdrantClient
-    from qdrant_client.models import VectorParams, Distance
+    from qdrant_client.models import (
+        Distance,
+        HnswConfigDiff,
+        ScalarQuantization,
+        ScalarQuantizationConfig,
+        ScalarType,
+        VectorParams,
+    )
 
     client = QdrantClient(path=str(Path(__file__).parent.parent / "data" / "qdrant_collection"))
 
@@ -31,10 +38,16 @@ def init_qdrant():
     exists = any(c.name == collection_name for c in collections)
 
     if not exists:
-        # Create collection with sentence-transformers dimensions (384 for all-MiniLM-L6-v2)
+        # Create collection with sentence-transformers dimensions (384 for all-MiniLM-L6-v2).
+        # INT8 scalar quantization kept in RAM cuts HNSW traversal bandwidth ~4x.
         client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+            # Vectors are L2-normalized at encode time, so dot product equals cosine
+            vectors_config=VectorParams(size=384, distance=Distance.DOT, on_disk=False),
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            ),
+            hnsw_config=HnswConfigDiff(m=16, ef_construct=128),
         )
         print(f"✓ Created Qdrant collection: {collection_name}")
     else:
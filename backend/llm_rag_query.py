@@ -13,6 +13,11 @@ try:
 except ImportError:
     from scripts.hybrid_retrieval import HybridRetriever
 
+try:
+    from create_db import create_query_logs_table
+except ImportError:
+    from scripts.create_db import create_query_logs_table
+
 
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
@@ -27,6 +32,25 @@ def log_event(conn, document_id: str, level: str, message: str):
     conn.commit()
 
 
+def log_query_metrics(
+    conn,
+    query: str,
+    country: Optional[str],
+    chunks_retrieved: int,
+    is_refusal: bool,
+    top_section: Optional[str],
+):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO query_logs (query, country, chunks_retrieved, is_refusal, top_section)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (query, country, chunks_retrieved, int(is_refusal), top_section),
+    )
+    conn.commit()
+
+
 def assemble_context(chunks: List[Dict]) -> str:
     context_parts = []
 
@@ -105,6 +129,7 @@ def rag_query(
 ) -> Dict:
     conn = sqlite3.connect(get_db_path())
     conn.execute("PRAGMA foreign_keys = ON")
+    create_query_logs_table(conn)
 
     retriever = HybridRetriever()
     chunks = retriever.retrieve(
@@ -139,6 +164,14 @@ def rag_query(
             "INFO",
             message,
         )
+        log_query_metrics(
+            conn,
+            user_query,
+            country,
+            len(chunks),
+            is_insufficient,
+            chunks[0]["payload"].get("section") if chunks else None,
+        )
 
     conn.close()
 
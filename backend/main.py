@@ -1,8 +1,12 @@
+import asyncio
+import os
 import sqlite3
 import sys
+import threading
 import time
 from pathlib import Path
 
+import torch
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,6 +15,9 @@ from prometheus_client import Counter, Gauge, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
 
+from hybrid_retrieval import HybridRetriever
+from models.schemas import QueryRequest
+
 load_dotenv()
 
 # Initialize LangSmith if available
@@ -54,10 +61,106 @@ retrieved_chunks_gauge = Gauge("rag_retrieved_chunks", "Number of chunks retriev
 llm_latency_histogram = Histogram("rag_llm_latency_seconds", "LLM response latency in seconds")
 
 
-class QueryRequest(BaseModel):
-    user_query: str
-    country: str | None = None
-    top_k: int = 10
+LOG_FLUSH_INTERVAL_SECONDS = 0.5
+
+# Rows kept per queue while the database stays locked; the oldest are dropped beyond this
+LOG_QUEUE_MAX_ROWS = 10_000
+
+_FLUSH_LOCK = threading.Lock()
+
+
+def open_db() -> sqlite3.Connection:
+    # scripts/ is on sys.path from the LangSmith import above
+    from create_db import create_query_logs_table
+
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    create_query_logs_table(conn)
+    return conn
+
+
+INGESTION_LOG_INSERT = "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)"
+QUERY_LOG_INSERT = (
+    "INSERT INTO query_logs (query, country, chunks_retrieved, is_refusal, top_section) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _flush_queue(queue: list, sql: str):
+    if not queue:
+        return
+
+    # Rows may be appended from worker threads while this runs, so only the
+    # snapshotted prefix is removed, and only once it is committed
+    rows = list(queue)
+
+    conn = app.state.log_db
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(sql, rows)
+        conn.execute("COMMIT")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        if isinstance(e, sqlite3.OperationalError) and "locked" in str(e):
+            # Another writer holds the database; retry next tick, within the cap
+            del queue[: max(0, len(queue) - LOG_QUEUE_MAX_ROWS)]
+        else:
+            # Anything else would fail the same way on every retry
+            print(f"[Logs] Dropping {len(rows)} rows that cannot be written")
+            del queue[: len(rows)]
+        raise
+    del queue[: len(rows)]
+
+
+def flush_logs():
+    """Write queued log rows, one transaction per table so one failing cannot block the other."""
+    errors = []
+    with _FLUSH_LOCK:
+        for queue, sql in (
+            (app.state.log_queue, INGESTION_LOG_INSERT),
+            (app.state.query_log_queue, QUERY_LOG_INSERT),
+        ):
+            try:
+                _flush_queue(queue, sql)
+            except sqlite3.Error as e:
+                errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+async def _flush_logs_periodically():
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL_SECONDS)
+        try:
+            # Off the event loop, so a writer holding the lock cannot stall requests
+            await asyncio.to_thread(flush_logs)
+        except sqlite3.Error as e:
+            print(f"[Logs] Flush failed: {e}")
+
+
+@app.on_event("startup")
+async def _init_state():
+    torch.set_num_threads(os.cpu_count() or 1)
+
+    # One WAL-mode connection per process; log rows are batched instead of committed per event
+    app.state.db = open_db()
+    # The flush thread writes through its own connection, apart from the request path
+    app.state.log_db = open_db()
+    app.state.log_queue = []
+    app.state.query_log_queue = []
+    app.state.log_flush_task = asyncio.create_task(_flush_logs_periodically())
+
+    # Loading the embedding model and building the BM25 index is expensive; do it once
+    app.state.retriever = HybridRetriever(log_queue=app.state.log_queue)
+
+
+@app.on_event("shutdown")
+async def _close_state():
+    app.state.log_flush_task.cancel()
+    flush_logs()
+    app.state.db.close()
+    app.state.log_db.close()
 
 
 class ChunkMetadata(BaseModel):
@@ -100,44 +203,48 @@ async def health():
 async def query_rag(request: QueryRequest):
     """Execute RAG query with filters."""
 
-    if not request.user_query or len(request.user_query.strip()) < 3:
-        raise HTTPException(status_code=400, detail="Query must be at least 3 characters")
-
     query_start = time.time()
     country = request.country or "unknown"
 
     try:
-        sys.path.append(str(Path(__file__).parent))
-
-        from hybrid_retrieval import HybridRetriever
-
-        retriever = HybridRetriever()
-        chunks = retriever.retrieve(
+        retriever = app.state.retriever
+        chunks = await retriever.aretrieve(
             query=request.user_query, country=request.country, K=request.top_k
         )
 
         retrieved_chunks_gauge.set(len(chunks))
 
         context_parts = []
-        chunk_texts = {}
+        chunk_texts = {
+            chunk["chunk_id"]: chunk["payload"]["text"]
+            for chunk in chunks
+            if "text" in chunk.get("payload", {})
+        }
+
+        # Points embedded before chunk text was stored in the payload still need SQLite
+        missing_ids = [
+            chunk.get("chunk_id", "")
+            for chunk in chunks
+            if chunk.get("chunk_id") not in chunk_texts
+        ]
+        if missing_ids:
+            placeholders = ",".join("?" * len(missing_ids))
+            cursor = app.state.db.execute(
+                f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})",
+                missing_ids,
+            )
+            chunk_texts.update(cursor.fetchall())
 
         for chunk in chunks:
             chunk_id = chunk.get("chunk_id", "")
             payload = chunk.get("payload", {})
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT text FROM chunks WHERE chunk_id = ?", (chunk_id,))
-            result = cursor.fetchone()
-            conn.close()
-
             section = payload.get("section", "")
             country = payload.get("country", "")
             doc_id = payload.get("document_id", "")
 
-            if result:
-                chunk_text = result[0]
-                chunk_texts[chunk_id] = chunk_text
+            chunk_text = chunk_texts.get(chunk_id)
+            if chunk_text is not None:
                 context_parts.append(
                     f"[Section: {section}] [Country: {country}] [Document ID: {doc_id}]\n{chunk_text}"
                 )
@@ -168,6 +275,16 @@ async def query_rag(request: QueryRequest):
 
         is_insufficient = answer and "INSUFFICIENT EVIDENCE" in answer.upper()
 
+        app.state.query_log_queue.append(
+            (
+                request.user_query,
+                request.country,
+                len(chunks),
+                int(bool(is_insufficient)),
+                chunks[0].get("payload", {}).get("section") if chunks else None,
+            )
+        )
+
         chunks_metadata = []
         for chunk in chunks:
             chunk_id = chunk.get("chunk_id", "")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, constr
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -15,12 +15,16 @@ class IngestResponse(BaseModel):
     errors: int
 
 
+CountryFilter = Literal["Ghana", "Nigeria", "Ghana|Nigeria"]
+
+
 class QueryRequest(BaseModel):
-    user_query: str
-    country: Optional[str] = None
+    # Bounds are enforced before the handler runs, so bad input never reaches retrieval
+    user_query: constr(strip_whitespace=True, min_length=3)
+    country: Optional[CountryFilter] = None
     disease: Optional[str] = None
     year: Optional[int] = None
-    top_k: int = 10
+    top_k: int = Field(10, ge=1, le=50)
 
 
 class ChunkMetadata(BaseModel):
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+class OnnxEncoder:
+    """SentenceTransformer-compatible encode() for MiniLM served by ONNX Runtime.
+
+    Used by both the retriever and scripts/embed_chunks.py so queries and chunks
+    are embedded by the same code. Export once with:
+        optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 onnx_minilm/
+    file_name selects which .onnx file in the export directory is loaded; an int8
+    copy written by `optimum-cli onnxruntime quantize` is model_quantized.onnx.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        provider: str = "CPUExecutionProvider",
+        file_name: str = "model.onnx",
+    ):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, provider=provider, file_name=file_name
+        )
+        self.max_seq_length = 256
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        batches = []
+        for i in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[i : i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+
+            # Mean pooling over real tokens, then L2 normalize, as all-MiniLM-L6-v2 does
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(batches)
+        return embeddings[0] if single else embeddings
+
+
+def load_onnx_encoder() -> OnnxEncoder:
+    """Build the encoder from ONNX_MODEL_DIR, ONNX_PROVIDER and ONNX_FILE_NAME."""
+    return OnnxEncoder(
+        os.environ.get("ONNX_MODEL_DIR", str(Path(__file__).parent / "onnx_minilm")),
+        provider=os.environ.get("ONNX_PROVIDER", "CPUExecutionProvider"),
+        file_name=os.environ.get("ONNX_FILE_NAME", "model.onnx"),
+    )
@@ -23,28 +23,18 @@ async def get_evaluation_metrics():
         cursor = conn.cursor()
 
         cursor.execute(
-            "SELECT COUNT(*) FROM ingestion_logs WHERE message LIKE 'LLM Query:%'"
+            "SELECT COUNT(*), COALESCE(SUM(is_refusal), 0), AVG(chunks_retrieved) FROM query_logs"
         )
-        total_queries = cursor.fetchone()[0]
+        total_queries, insufficient_queries, avg_chunks = cursor.fetchone()
 
-        cursor.execute(
-            "SELECT COUNT(*) FROM ingestion_logs WHERE message LIKE '%Refusal: False%'"
-        )
-        sufficient_queries = cursor.fetchone()[0]
-
-        insufficient_queries = total_queries - sufficient_queries
+        sufficient_queries = total_queries - insufficient_queries
 
         refusal_rate = (
             (insufficient_queries / total_queries) if total_queries > 0 else 0
         )
 
         cursor.execute(
-            "SELECT AVG(CAST(SUBSTR(message, INSTR(message, 'Chunks retrieved:') + 16, INSTR(SUBSTR(message, INSTR(message, 'Chunks retrieved:') + 16), ',') - 1) AS REAL)) FROM ingestion_logs WHERE message LIKE 'LLM Query:%'"
-        )
-        avg_chunks = cursor.fetchone()[0] or 0
-
-        cursor.execute(
-            "SELECT SUBSTR(SUBSTR(message, INSTR(message, 'Section:') + 9), INSTR(SUBSTR(message, INSTR(message, 'Section:') + 9), '-') - 1) as section, COUNT(*) as count FROM ingestion_logs WHERE message LIKE '%Section: %' GROUP BY section ORDER BY count DESC LIMIT 5"
+            "SELECT top_section, COUNT(*) AS count FROM query_logs WHERE top_section IS NOT NULL GROUP BY top_section ORDER BY count DESC LIMIT 5"
         )
         top_sections = []
         for row in cursor.fetchall():
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
+import asyncio
 import sys
 from pathlib import Path
 from typing import List
-import shutil
+import aiofiles
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
@@ -13,6 +14,14 @@ router = APIRouter(prefix="/ingest", tags=["ingestion"])
 
 PDF_DIR = Path(__file__).parent.parent.parent / "data" / "raw" / "pfds"
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+async def save_upload(file: UploadFile, file_path: Path):
+    async with aiofiles.open(file_path, "wb") as out:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await out.write(chunk)
+
 
 @router.post("/pdfs", response_model=IngestResponse)
 async def ingest_pdfs(files: List[UploadFile] = File(...)):
@@ -24,30 +33,38 @@ async def ingest_pdfs(files: List[UploadFile] = File(...)):
     if not PDF_DIR.exists():
         PDF_DIR.mkdir(parents=True, exist_ok=True)
 
-    saved_files = []
+    pending = {}
 
     for file in files:
         file_path = PDF_DIR / file.filename
 
-        if file_path.exists():
+        if file_path.exists() or file_path in pending:
             continue
 
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            saved_files.append(file.filename)
-        except Exception as e:
+        pending[file_path] = file
+
+    results = await asyncio.gather(
+        *(save_upload(file, file_path) for file_path, file in pending.items()),
+        return_exceptions=True,
+    )
+
+    saved_files = []
+
+    for file, result in zip(pending.values(), results, strict=True):
+        if isinstance(result, Exception):
             return JSONResponse(
                 status_code=500,
                 content={
                     "success": False,
-                    "message": f"Error saving {file.filename}: {str(e)}",
+                    "message": f"Error saving {file.filename}: {str(result)}",
                     "documents_processed": 0,
                     "duplicates_skipped": 0,
                     "errors": 1,
                 },
             )
 
+        saved_files.append(file.filename)
+
     if not saved_files:
         return IngestResponse(
             success=True,
@@ -1,64 +1,110 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-import sys
+from fastapi import APIRouter, HTTPException, Response
+from cachetools import TTLCache
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import threading
 import sqlite3
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 from backend.models.schemas import QueryRequest, QueryResponse
 from scripts.llm_rag_query import rag_query
 
 router = APIRouter(prefix="/query", tags=["query"])
 
 
+_read_conn: Optional[sqlite3.Connection] = None
+_read_lock = threading.Lock()
+
+_response_cache: TTLCache = TTLCache(maxsize=512, ttl=900)
+_response_cache_lock = asyncio.Lock()
+
+
 def get_db_path():
     return Path(__file__).parent.parent.parent / "data" / "metadata" / "documents.db"
 
 
+def get_read_connection() -> sqlite3.Connection:
+    """Process-lifetime read-only connection for enriching query results."""
+    global _read_conn
+    if _read_conn is None:
+        conn = sqlite3.connect(
+            f"file:{get_db_path()}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-20000")
+        _read_conn = conn
+    return _read_conn
+
+
+@router.on_event("shutdown")
+def close_read_connection():
+    global _read_conn
+    if _read_conn is not None:
+        _read_conn.close()
+        _read_conn = None
+
+
+def _fetch_chunk_texts(chunk_ids: List[str]) -> Dict[str, str]:
+    placeholders = ",".join("?" * len(chunk_ids))
+    # The shared connection is used from worker threads, one statement at a time
+    with _read_lock:
+        cursor = get_read_connection().cursor()
+        cursor.execute(
+            f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})",
+            chunk_ids,
+        )
+        return dict(cursor.fetchall())
+
+
+def _cache_key(request: QueryRequest) -> str:
+    query = request.user_query.strip().lower()
+    canonical = f"{query}|{request.country}|{request.top_k}"
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
 @router.post("", response_model=QueryResponse)
-async def query_rag(request: QueryRequest):
+async def query_rag(request: QueryRequest, http_response: Response):
     """Execute RAG query with filters."""
 
-    if not request.user_query or len(request.user_query.strip()) < 3:
-        raise HTTPException(
-            status_code=400, detail="Query must be at least 3 characters"
-        )
+    cache_key = _cache_key(request)
+    async with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+    if cached is not None:
+        http_response.headers["X-Cache"] = "HIT"
+        return cached
 
     try:
-        response = rag_query(
-            user_query=request.user_query, country=request.country, top_k=request.top_k
+        response = await asyncio.to_thread(
+            rag_query,
+            user_query=request.user_query,
+            country=request.country,
+            top_k=request.top_k,
         )
 
-        conn = sqlite3.connect(get_db_path())
-
-        chunks_metadata = []
-        for chunk in response.get("retrieved_chunks", []):
-            chunk_id = chunk.get("chunk_id")
-
-            cursor = conn.cursor()
-            cursor.execute("SELECT text FROM chunks WHERE chunk_id = ?", (chunk_id,))
-            result = cursor.fetchone()
-            chunk_text = result[0] if result else ""
-
-            chunks_metadata.append(
-                {
-                    "chunk_id": chunk_id,
-                    "document_id": chunk.get("payload", {}).get("document_id"),
-                    "section": chunk.get("payload", {}).get("section"),
-                    "text": chunk_text,
-                    "char_count": chunk.get("payload", {}).get("char_count"),
-                    "final_score": chunk.get("final_score", 0.0),
-                    "semantic_score": chunk.get("semantic_score", 0.0),
-                    "bm25_score": chunk.get("bm25_score", 0.0),
-                    "country": chunk.get("payload", {}).get("country"),
-                    "section_boost": chunk.get("section_boost", 0.0),
-                }
-            )
-
-        conn.close()
-
-        return QueryResponse(
+        retrieved_chunks = response.get("retrieved_chunks", [])
+        chunk_ids = [chunk.get("chunk_id") for chunk in retrieved_chunks]
+
+        chunk_texts = await asyncio.to_thread(_fetch_chunk_texts, chunk_ids)
+
+        chunks_metadata = [
+            {
+                "chunk_id": chunk.get("chunk_id"),
+                "document_id": chunk.get("payload", {}).get("document_id"),
+                "section": chunk.get("payload", {}).get("section"),
+                "text": chunk_texts.get(chunk.get("chunk_id"), ""),
+                "char_count": chunk.get("payload", {}).get("char_count"),
+                "final_score": chunk.get("final_score", 0.0),
+                "semantic_score": chunk.get("semantic_score", 0.0),
+                "bm25_score": chunk.get("bm25_score", 0.0),
+                "country": chunk.get("payload", {}).get("country"),
+                "section_boost": chunk.get("section_boost", 0.0),
+            }
+            for chunk in retrieved_chunks
+        ]
+
+        query_response = QueryResponse(
             query=response["query"],
             answer=response["answer"],
             retrieved_chunks=chunks_metadata,
@@ -68,5 +114,11 @@ async def query_rag(request: QueryRequest):
             filters_applied=response["filters_applied"],
         )
 
+        async with _response_cache_lock:
+            _response_cache[cache_key] = query_response
+        http_response.headers["X-Cache"] = "MISS"
+
+        return query_response
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
@@ -0,0 +1,21 @@
+"""
+Shared fixtures for backend tests
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole session.
+
+    Startup hooks are not run (no `with` block), so no model, index or database is loaded;
+    only requests that are answered before touching app.state can use it.
+    """
+    pytest.importorskip("torch")
+    pytest.importorskip("sentence_transformers")
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    return TestClient(app)
@@ -0,0 +1,44 @@
+"""
+Unit tests for indicator scanning in scripts/country_attribution.py
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("ahocorasick")
+
+import country_attribution  # noqa: E402
+
+
+def _random_texts(count=200, seed=0):
+    rng = random.Random(seed)
+    words = [
+        indicator
+        for _, indicators in country_attribution.INDICATOR_BUCKETS
+        for indicator in indicators
+    ] + ["malaria", "the", "of", "a"]
+    for _ in range(count):
+        picked = rng.choices(words, k=rng.randint(1, 30))
+        separators = rng.choices(["", " ", ", "], k=len(picked))
+        yield "".join(word + sep for word, sep in zip(picked, separators, strict=True))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "university of ghana health service",
+        "ghanaccra",
+        "nigerianigeria",
+        "lagos state ministry of health, abuja and kano",
+        "",
+        *_random_texts(),
+    ],
+)
+def test_fallback_matches_automaton(monkeypatch, text):
+    """Test the regex-free fallback returns the same counts and positions as Aho-Corasick"""
+    expected = country_attribution._scan_indicators(text)
+
+    monkeypatch.setattr(country_attribution, "INDICATOR_AUTOMATON", None)
+    assert country_attribution._scan_indicators(text) == expected
@@ -0,0 +1,42 @@
+"""
+Unit tests for the cross-encoder score cache in hybrid_retrieval.Reranker
+"""
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from cachetools import TTLCache  # noqa: E402
+
+from backend import hybrid_retrieval  # noqa: E402
+
+
+class FakeCrossEncoder:
+    """Scores a pair by its text length and records every pair it is asked to score."""
+
+    def __init__(self, model_name, max_length=512):
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=32):
+        self.pairs.extend(pairs)
+        return [float(len(text)) for _, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    monkeypatch.setattr(hybrid_retrieval, "CrossEncoder", FakeCrossEncoder)
+    return hybrid_retrieval.Reranker("fake-model")
+
+
+def test_score_reuses_cached_pairs(reranker):
+    """Test pairs scored once are served from the cache on the next call"""
+    assert reranker.score("q", ["a", "b"], ["x", "yy"]).tolist() == [1.0, 2.0]
+    assert reranker.score("q", ["b", "c"], ["yy", "zzz"]).tolist() == [2.0, 3.0]
+    assert reranker.cross_encoder.pairs == [("q", "x"), ("q", "yy"), ("q", "zzz")]
+
+
+def test_score_survives_cache_eviction(reranker):
+    """Test scores evicted while a call is still running are returned, not a KeyError"""
+    reranker._scores = TTLCache(maxsize=1, ttl=900)
+
+    assert reranker.score("q", ["a", "b", "c"], ["x", "yy", "zzz"]).tolist() == [1.0, 2.0, 3.0]
@@ -1,7 +1,10 @@
+import os
 import sqlite3
 import fitz
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import List
 
 
 def get_db_path():
@@ -16,13 +19,24 @@ def get_pdfs_dir():
     return pdfs_dir
 
 
+_LOG_BUFFER: List[tuple] = []
+
+
 def log_event(conn, document_id: str, level: str, message: str):
-    cursor = conn.cursor()
-    cursor.execute(
+    # Buffered; written in one executemany by flush_logs at document boundaries
+    _LOG_BUFFER.append((document_id, level, message))
+
+
+def flush_logs(conn):
+    if not _LOG_BUFFER:
+        return
+
+    conn.executemany(
         "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
-        (document_id, level, message),
+        _LOG_BUFFER,
     )
     conn.commit()
+    _LOG_BUFFER.clear()
 
 
 def create_chunks_table(conn):
@@ -60,6 +74,23 @@ def get_unchunked_documents(conn):
     return cursor.fetchall()
 
 
+def has_text_cache(conn) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'document_text'"
+    )
+    return cursor.fetchone() is not None
+
+
+def get_cached_text(conn, document_id: str):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT text, page_count FROM document_text WHERE document_id = ?",
+        (document_id,),
+    )
+    return cursor.fetchone()
+
+
 def has_chunks(conn, document_id: str) -> bool:
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM chunks WHERE document_id = ?", (document_id,))
@@ -71,95 +102,80 @@ def chunk_text(text: str, page_start: int, page_end: int) -> list:
     max_size = 1500
 
     chunks = []
-    words = text.split()
     current_chunk = []
+    current_len = 0
 
-    for word in words:
-        test_chunk = " ".join(current_chunk + [word])
-        if len(test_chunk) <= max_size:
+    for word in text.split():
+        # Length the joined chunk would have, without building it
+        added_len = len(word) + (1 if current_chunk else 0)
+        if current_len + added_len <= max_size:
             current_chunk.append(word)
+            current_len += added_len
         else:
-            if current_chunk:
-                chunk_text = " ".join(current_chunk)
-                if len(chunk_text) >= min_size:
-                    chunks.append((chunk_text, page_start, page_end))
+            if current_len >= min_size:
+                chunks.append((" ".join(current_chunk), page_start, page_end))
             current_chunk = [word]
+            current_len = len(word)
 
-    if current_chunk:
-        chunk_text = " ".join(current_chunk)
-        if len(chunk_text) >= min_size:
-            chunks.append((chunk_text, page_start, page_end))
+    if current_len >= min_size:
+        chunks.append((" ".join(current_chunk), page_start, page_end))
 
     return chunks
 
 
-def process_document(
-    conn, document_id: str, filename: str, file_path: str, pdfs_dir: Path
-) -> dict:
-    result = {"status": "success", "chunks_created": 0, "error": None}
-
-    if has_chunks(conn, document_id):
-        log_event(conn, document_id, "INFO", f"Skipped: {filename} already has chunks")
-        result["status"] = "skipped"
-        return result
-
-    full_path = (
+def resolve_pdf_path(file_path: str, pdfs_dir: Path) -> Path:
+    return (
         pdfs_dir / Path(file_path).name
         if not Path(file_path).is_absolute()
         else Path(file_path)
     )
 
-    if not full_path.exists():
-        log_event(conn, document_id, "ERROR", f"File not found: {filename}")
-        result["status"] = "error"
-        result["error"] = "File not found"
-        return result
-
-    try:
-        doc = fitz.open(str(full_path))
-        page_count = len(doc)
-        full_text = ""
-
-        for page_num in range(page_count):
-            page = doc[page_num]
-            full_text += " " + str(page.get_text())
-
-        doc.close()
-
-        chunks = chunk_text(full_text, 1, page_count)
-
-        for chunk, page_start, page_end in chunks:
-            chunk_id = str(uuid.uuid4())
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO chunks (chunk_id, document_id, section, text, char_count, page_start, page_end)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    chunk_id,
-                    document_id,
-                    "full_text",
-                    chunk,
-                    len(chunk),
-                    page_start,
-                    page_end,
-                ),
-            )
-            conn.commit()
-            result["chunks_created"] += 1
-
-        message = f"File: {filename}, Chunks created: {result['chunks_created']}, Pages: {page_count}"
-        log_event(conn, document_id, "INFO", message)
 
-    except Exception as e:
-        log_event(
-            conn, document_id, "ERROR", f"Chunking failed for {filename}: {str(e)}"
+def extract_chunks(full_path: str) -> tuple:
+    """Parse and chunk one PDF. Runs in a worker process, so it never touches SQLite."""
+    doc = fitz.open(full_path)
+    page_count = len(doc)
+    # get_page_text doesn't keep a Page object alive per page, so memory stays flat
+    full_text = " ".join(doc.get_page_text(i) for i in range(page_count))
+
+    doc.close()
+
+    return chunk_text(full_text, 1, page_count), page_count
+
+
+def store_chunks(
+    conn, document_id: str, filename: str, chunks: list, page_count: int
+) -> int:
+    # One urandom read for the whole document; same canonical form as str(uuid.uuid4())
+    # because chunk ids double as Qdrant point ids, which come back dashed
+    raw = os.urandom(16 * len(chunks))
+    rows = [
+        (
+            str(uuid.UUID(bytes=raw[i * 16 : (i + 1) * 16], version=4)),
+            document_id,
+            "full_text",
+            chunk,
+            len(chunk),
+            page_start,
+            page_end,
+        )
+        for i, (chunk, page_start, page_end) in enumerate(chunks)
+    ]
+
+    # One transaction per document instead of a commit per chunk
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO chunks (chunk_id, document_id, section, text, char_count, page_start, page_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
         )
-        result["status"] = "error"
-        result["error"] = str(e)
 
-    return result
+    message = f"File: {filename}, Chunks created: {len(rows)}, Pages: {page_count}"
+    log_event(conn, document_id, "INFO", message)
+
+    return len(rows)
 
 
 def run_chunking():
@@ -171,6 +187,9 @@ def run_chunking():
 
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
 
     create_chunks_table(conn)
 
@@ -183,27 +202,79 @@ def run_chunking():
             "INFO",
             "No documents to chunk (all already processed or no accepted documents)",
         )
+        flush_logs(conn)
         return {"processed": 0, "skipped": 0, "total_chunks": 0, "errors": 0}
 
     pdfs_dir = get_pdfs_dir()
 
     results = {"processed": 0, "skipped": 0, "total_chunks": 0, "errors": 0}
 
-    for document_id, filename, file_path in unchunked_docs:
-        try:
-            result = process_document(conn, document_id, filename, file_path, pdfs_dir)
+    use_text_cache = has_text_cache(conn)
 
-            if result["status"] == "success":
-                results["processed"] += 1
-                results["total_chunks"] += result["chunks_created"]
-            elif result["status"] == "skipped":
+    futures = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for document_id, filename, file_path in unchunked_docs:
+            if has_chunks(conn, document_id):
+                log_event(
+                    conn, document_id, "INFO", f"Skipped: {filename} already has chunks"
+                )
                 results["skipped"] += 1
-            else:
+                continue
+
+            # Country attribution already parsed this PDF; reuse its text when stored
+            cached = get_cached_text(conn, document_id) if use_text_cache else None
+            if cached is not None:
+                text, page_count = cached
+                try:
+                    chunks = chunk_text(text, 1, page_count)
+                    results["total_chunks"] += store_chunks(
+                        conn, document_id, filename, chunks, page_count
+                    )
+                    results["processed"] += 1
+
+                except Exception as e:
+                    log_event(
+                        conn,
+                        document_id,
+                        "ERROR",
+                        f"Chunking failed for {filename}: {str(e)}",
+                    )
+                    results["errors"] += 1
+                continue
+
+            full_path = resolve_pdf_path(file_path, pdfs_dir)
+            if not full_path.exists():
+                log_event(conn, document_id, "ERROR", f"File not found: {filename}")
                 results["errors"] += 1
+                continue
 
-        except Exception as e:
-            log_event(conn, document_id, "ERROR", f"Processing failed: {str(e)}")
-            results["errors"] += 1
+            futures[executor.submit(extract_chunks, str(full_path))] = (
+                document_id,
+                filename,
+            )
+
+        flush_logs(conn)
+
+        # PDF parsing fans out across cores; all SQLite writes stay in this process
+        for future in as_completed(futures):
+            document_id, filename = futures[future]
+            try:
+                chunks, page_count = future.result()
+                results["total_chunks"] += store_chunks(
+                    conn, document_id, filename, chunks, page_count
+                )
+                results["processed"] += 1
+
+            except Exception as e:
+                log_event(
+                    conn,
+                    document_id,
+                    "ERROR",
+                    f"Chunking failed for {filename}: {str(e)}",
+                )
+                results["errors"] += 1
+
+            flush_logs(conn)
 
     summary_message = (
         f"Chunking completed: "
@@ -213,15 +284,20 @@ def run_chunking():
         f"{results['errors']} errors"
     )
     log_event(conn, None, "INFO", summary_message)
+    flush_logs(conn)
 
     conn.close()
 
     return results
 
 
-if __name__ == "__main__":
+def main():
     results = run_chunking()
     print(f"Processed: {results['processed']}")
     print(f"Skipped: {results['skipped']}")
     print(f"Total chunks: {results['total_chunks']}")
     print(f"Errors: {results['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
+import os
 import sqlite3
 import fitz
 from pathlib import Path
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict, List, Tuple, Optional
 
+try:
+    import ahocorasick
+
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
@@ -16,13 +26,24 @@ def get_pdfs_dir():
     return pdfs_dir
 
 
+_LOG_BUFFER: List[tuple] = []
+
+
 def log_event(conn, document_id: str, level: str, message: str):
-    cursor = conn.cursor()
-    cursor.execute(
+    # Buffered; written in one executemany by flush_logs at document boundaries
+    _LOG_BUFFER.append((document_id, level, message))
+
+
+def flush_logs(conn):
+    if not _LOG_BUFFER:
+        return
+
+    conn.executemany(
         "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
-        (document_id, level, message),
+        _LOG_BUFFER,
     )
     conn.commit()
+    _LOG_BUFFER.clear()
 
 
 def get_accepted_documents(conn):
@@ -33,6 +54,27 @@ def get_accepted_documents(conn):
     return cursor.fetchall()
 
 
+def create_document_text_table(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_text (
+            document_id TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            page_count INTEGER NOT NULL,
+            FOREIGN KEY (document_id) REFERENCES documents(document_id)
+        )
+    """)
+    conn.commit()
+
+
+def store_document_text(conn, document_id: str, text: str, page_count: int):
+    # Committed with the country update; chunking reads it instead of re-parsing the PDF
+    conn.execute(
+        "INSERT OR REPLACE INTO document_text (document_id, text, page_count) VALUES (?, ?, ?)",
+        (document_id, text, page_count),
+    )
+
+
 def update_document_country(
     conn,
     document_id: str,
@@ -50,19 +92,27 @@ def update_document_country(
 
 
 def extract_document_text(pdf_path: str) -> Dict[str, str]:
-    sections = {"full_text": "", "title": "", "abstract": "", "affiliations": ""}
+    sections = {
+        "full_text": "",
+        "title": "",
+        "abstract": "",
+        "affiliations": "",
+        "full_text_lower": "",
+        "page_count": 0,
+        # (start, end) of each section within full_text, for positional match lookups
+        "ranges": {},
+    }
 
     try:
         doc = fitz.open(pdf_path)
-        all_text = []
-
-        for page in doc:
-            text = page.get_text()
-            all_text.append(text)
-
-        sections["full_text"] = " ".join(all_text)
+        sections["page_count"] = len(doc)
+        # get_page_text doesn't keep a Page object alive per page, so memory stays flat
+        sections["full_text"] = " ".join(
+            doc.get_page_text(i) for i in range(sections["page_count"])
+        )
 
         full_text_lower = sections["full_text"].lower()
+        sections["full_text_lower"] = full_text_lower
 
         title_keywords = ["title", "title:", "title -", "title:"]
         for keyword in title_keywords:
@@ -71,6 +121,7 @@ def extract_document_text(pdf_path: str) -> Dict[str, str]:
                 title_start = idx + len(keyword)
                 title_end = full_text_lower.find("\n", title_start)
                 if title_end != -1:
+                    sections["ranges"]["title"] = (title_start, title_end)
                     sections["title"] = sections["full_text"][
                         title_start:title_end
                     ].strip()
@@ -89,6 +140,7 @@ def extract_document_text(pdf_path: str) -> Dict[str, str]:
                 abstract_start = idx + len(keyword)
                 abstract_end = full_text_lower.find("\n\n", abstract_start)
                 if abstract_end != -1:
+                    sections["ranges"]["abstract"] = (abstract_start, abstract_end)
                     sections["abstract"] = sections["full_text"][
                         abstract_start:abstract_end
                     ].strip()
@@ -108,6 +160,7 @@ def extract_document_text(pdf_path: str) -> Dict[str, str]:
                 aff_start = idx
                 aff_end = full_text_lower.find("\n\n", aff_start)
                 if aff_end != -1:
+                    sections["ranges"]["affiliations"] = (aff_start, aff_end)
                     sections["affiliations"] = sections["full_text"][
                         aff_start:aff_end
                     ].strip()
@@ -117,59 +170,112 @@ def extract_document_text(pdf_path: str) -> Dict[str, str]:
 
     except Exception as e:
         sections["full_text"] = ""
+        sections["full_text_lower"] = ""
+        sections["ranges"] = {}
 
     return sections
 
 
-def detect_country(text: str) -> Dict[str, any]:
-    ghana_indicators = [
-        "ghana",
-        "accra",
-        "kumasi",
-        "tamale",
-        "takoradi",
-        "university of ghana",
-        "kwame nkrumah university",
-        "ghana health service",
-        "korle bu",
-        "legon",
-        "ashanti",
-        "greater accra",
+GHANA_INDICATORS = [
+    "ghana",
+    "accra",
+    "kumasi",
+    "tamale",
+    "takoradi",
+    "university of ghana",
+    "kwame nkrumah university",
+    "ghana health service",
+    "korle bu",
+    "legon",
+    "ashanti",
+    "greater accra",
+]
+
+NIGERIA_INDICATORS = [
+    "nigeria",
+    "abuja",
+    "lagos",
+    "kano",
+    "ibadan",
+    "port harcourt",
+    "kaduna",
+    "benin city",
+    "university of ibadan",
+    "university of lagos",
+    "ahmadu bello university",
+    "nigeria centre",
+    "federal ministry",
+    "nigeria medical",
+    "nig",
+]
+
+INDICATOR_BUCKETS = (("ghana", GHANA_INDICATORS), ("nigeria", NIGERIA_INDICATORS))
+
+
+def _build_indicator_automaton():
+    automaton = ahocorasick.Automaton()
+    for bucket, indicators in INDICATOR_BUCKETS:
+        for indicator in indicators:
+            automaton.add_word(indicator, (bucket, indicator))
+    automaton.make_automaton()
+    return automaton
+
+
+INDICATOR_AUTOMATON = _build_indicator_automaton() if AHOCORASICK_AVAILABLE else None
+
+
+def _scan_indicators(
+    text_lower: str,
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, List[int]]]:
+    """Count each indicator (as str.count would) and record every start position."""
+    counts = {"ghana": {}, "nigeria": {}}
+    positions: Dict[str, List[int]] = {}
+
+    if INDICATOR_AUTOMATON is None:
+        # One find loop per indicator, so hits overlapping any other match still count
+        for bucket, indicators in INDICATOR_BUCKETS:
+            for indicator in indicators:
+                start = text_lower.find(indicator)
+                if start == -1:
+                    continue
+                indicator_positions = positions.setdefault(indicator, [])
+                count = 0
+                last_end = -1
+                while start != -1:
+                    indicator_positions.append(start)
+                    if start >= last_end:
+                        count += 1
+                        last_end = start + len(indicator)
+                    start = text_lower.find(indicator, start + 1)
+                counts[bucket][indicator] = count
+        return counts, positions
+
+    # Single pass over the text; skip self-overlapping hits so counts match str.count
+    last_end = {}
+    for end_idx, (bucket, indicator) in INDICATOR_AUTOMATON.iter(text_lower):
+        positions.setdefault(indicator, []).append(end_idx - len(indicator) + 1)
+        if end_idx - len(indicator) < last_end.get(indicator, -1):
+            continue
+        last_end[indicator] = end_idx
+        counts[bucket][indicator] = counts[bucket].get(indicator, 0) + 1
+
+    return counts, positions
+
+
+def detect_country(sections: Dict[str, str]) -> Dict[str, any]:
+    counts, positions = _scan_indicators(sections["full_text_lower"])
+
+    ghana_matches = [
+        (indicator, counts["ghana"][indicator])
+        for indicator in GHANA_INDICATORS
+        if indicator in counts["ghana"]
     ]
-
-    nigeria_indicators = [
-        "nigeria",
-        "abuja",
-        "lagos",
-        "kano",
-        "ibadan",
-        "port harcourt",
-        "kaduna",
-        "benin city",
-        "university of ibadan",
-        "university of lagos",
-        "ahmadu bello university",
-        "nigeria centre",
-        "federal ministry",
-        "nigeria medical",
-        "nig",
+    nigeria_matches = [
+        (indicator, counts["nigeria"][indicator])
+        for indicator in NIGERIA_INDICATORS
+        if indicator in counts["nigeria"]
     ]
 
-    text_lower = text.lower()
-
-    ghana_matches = []
-    nigeria_matches = []
-
-    for indicator in ghana_indicators:
-        if indicator in text_lower:
-            count = text_lower.count(indicator)
-            ghana_matches.append((indicator, count))
-
-    for indicator in nigeria_indicators:
-        if indicator in text_lower:
-            count = text_lower.count(indicator)
-            nigeria_matches.append((indicator, count))
-
     return {
         "ghana_detected": len(ghana_matches) > 0,
         "nigeria_detected": len(nigeria_matches) > 0,
@@ -177,44 +283,57 @@ def detect_country(text: str) -> Dict[str, any]:
         "nigeria_matches": nigeria_matches,
         "ghana_count": sum(m[1] for m in ghana_matches),
         "nigeria_count": sum(m[1] for m in nigeria_matches),
+        "positions": positions,
     }
 
 
+def _matched_in_section(
+    sections: Dict[str, str], detection: Dict[str, any], bucket: str, section: str
+) -> bool:
+    if not sections[section] or section not in sections["ranges"]:
+        return False
+
+    start, end = sections["ranges"][section]
+    for indicator, _ in detection[f"{bucket}_matches"]:
+        indicator_positions = detection["positions"][indicator]
+        # First occurrence at or after the section start is the only one that can fit
+        i = bisect_left(indicator_positions, start)
+        if (
+            i < len(indicator_positions)
+            and indicator_positions[i] + len(indicator) <= end
+        ):
+            return True
+
+    return False
+
+
 def calculate_confidence(
     sections: Dict[str, str], detection: Dict[str, any]
 ) -> Tuple[float, str]:
     high_confidence_sections = ["title", "affiliations"]
     medium_confidence_sections = ["abstract"]
 
-    ghana_in_high = any(
-        detection["ghana_detected"]
-        and any(m[0] in sections[section].lower() for m in detection["ghana_matches"])
+    ghana_in_high = detection["ghana_detected"] and any(
+        _matched_in_section(sections, detection, "ghana", section)
         for section in high_confidence_sections
-        if sections[section]
     )
 
-    nigeria_in_high = any(
-        detection["nigeria_detected"]
-        and any(m[0] in sections[section].lower() for m in detection["nigeria_matches"])
+    nigeria_in_high = detection["nigeria_detected"] and any(
+        _matched_in_section(sections, detection, "nigeria", section)
         for section in high_confidence_sections
-        if sections[section]
     )
 
     if ghana_in_high or nigeria_in_high:
         return 1.0, "title/affiliations"
 
-    ghana_in_medium = any(
-        detection["ghana_detected"]
-        and any(m[0] in sections[section].lower() for m in detection["ghana_matches"])
+    ghana_in_medium = detection["ghana_detected"] and any(
+        _matched_in_section(sections, detection, "ghana", section)
         for section in medium_confidence_sections
-        if sections[section]
     )
 
-    nigeria_in_medium = any(
-        detection["nigeria_detected"]
-        and any(m[0] in sections[section].lower() for m in detection["nigeria_matches"])
+    nigeria_in_medium = detection["nigeria_detected"] and any(
+        _matched_in_section(sections, detection, "nigeria", section)
         for section in medium_confidence_sections
-        if sections[section]
     )
 
     if ghana_in_medium or nigeria_in_medium:
@@ -227,7 +346,7 @@ def calculate_confidence(
 
 
 def classify_country(sections: Dict[str, str]) -> Dict[str, any]:
-    detection = detect_country(sections["full_text"])
+    detection = detect_country(sections)
 
     confidence, source = calculate_confidence(sections, detection)
 
@@ -264,25 +383,28 @@ def classify_country(sections: Dict[str, str]) -> Dict[str, any]:
     }
 
 
-def process_document(
-    conn, document_id: str, filename: str, file_path: str, pdfs_dir: Path
-) -> Dict[str, any]:
-    full_path = (
+def resolve_pdf_path(file_path: str, pdfs_dir: Path) -> Path:
+    return (
         pdfs_dir / Path(file_path).name
         if not Path(file_path).is_absolute()
         else Path(file_path)
     )
 
-    if not full_path.exists():
-        log_event(conn, document_id, "ERROR", f"File not found: {filename}")
-        update_document_country(
-            conn, document_id, None, 0.0, "rejected", "File not found"
-        )
-        return {"status": "rejected", "country": None, "confidence": 0.0}
 
-    sections = extract_document_text(str(full_path))
+def analyze_document(full_path: str) -> Tuple[Optional[Dict[str, any]], str, int]:
+    """Extract and classify one PDF in a worker process; never touches SQLite."""
+    sections = extract_document_text(full_path)
 
     if not sections["full_text"]:
+        return None, "", 0
+
+    return classify_country(sections), sections["full_text"], sections["page_count"]
+
+
+def record_attribution(
+    conn, document_id: str, filename: str, result: Optional[Dict[str, any]]
+) -> Dict[str, any]:
+    if result is None:
         log_event(
             conn, document_id, "ERROR", f"Failed to extract text from: {filename}"
         )
@@ -291,8 +413,6 @@ def process_document(
         )
         return {"status": "rejected", "country": None, "confidence": 0.0}
 
-    result = classify_country(sections)
-
     level = (
         "INFO"
         if result["confidence"] == 1.0
@@ -334,34 +454,69 @@ def run_country_attribution():
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys = ON")
 
+    create_document_text_table(conn)
+
     accepted_docs = get_accepted_documents(conn)
 
     if not accepted_docs:
         log_event(conn, None, "INFO", "No accepted documents found")
+        flush_logs(conn)
         return {"accepted": 0, "rejected": 0, "partial": 0}
 
     pdfs_dir = get_pdfs_dir()
 
     results = {"accepted": 0, "rejected": 0, "partial": 0}
 
-    for document_id, filename, file_path in accepted_docs:
-        try:
-            result = process_document(conn, document_id, filename, file_path, pdfs_dir)
+    futures = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for document_id, filename, file_path in accepted_docs:
+            full_path = resolve_pdf_path(file_path, pdfs_dir)
+            if not full_path.exists():
+                log_event(conn, document_id, "ERROR", f"File not found: {filename}")
+                update_document_country(
+                    conn, document_id, None, 0.0, "rejected", "File not found"
+                )
+                results["rejected"] += 1
+                continue
+
+            futures[executor.submit(analyze_document, str(full_path))] = (
+                document_id,
+                filename,
+            )
+
+        flush_logs(conn)
+
+        # PDF parsing fans out across cores; all SQLite writes stay in this process
+        for future in as_completed(futures):
+            document_id, filename = futures[future]
+            try:
+                result, full_text, page_count = future.result()
+                if full_text:
+                    store_document_text(conn, document_id, full_text, page_count)
 
-            if result["status"] == "accepted":
-                if result["confidence"] == 1.0:
-                    results["accepted"] += 1
+                result = record_attribution(conn, document_id, filename, result)
+
+                if result["status"] == "accepted":
+                    if result["confidence"] == 1.0:
+                        results["accepted"] += 1
+                    else:
+                        results["partial"] += 1
                 else:
-                    results["partial"] += 1
-            else:
+                    results["rejected"] += 1
+
+            except Exception as e:
+                log_event(conn, document_id, "ERROR", f"Processing failed: {str(e)}")
+                update_document_country(
+                    conn,
+                    document_id,
+                    None,
+                    0.0,
+                    "rejected",
+                    f"Processing error: {str(e)}",
+                )
                 results["rejected"] += 1
 
-        except Exception as e:
-            log_event(conn, document_id, "ERROR", f"Processing failed: {str(e)}")
-            update_document_country(
-                conn, document_id, None, 0.0, "rejected", f"Processing error: {str(e)}"
-            )
-            results["rejected"] += 1
+            flush_logs(conn)
 
     summary_message = (
         f"Country attribution completed: "
@@ -370,14 +525,19 @@ def run_country_attribution():
         f"{results['rejected']} rejected"
     )
     log_event(conn, None, "INFO", summary_message)
+    flush_logs(conn)
 
     conn.close()
 
     return results
 
 
-if __name__ == "__main__":
+def main():
     results = run_country_attribution()
     print(f"High confidence: {results['accepted']}")
     print(f"Partial confidence: {results['partial']}")
     print(f"Rejected: {results['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
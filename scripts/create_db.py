@@ -7,11 +7,33 @@ def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
 
 
+def create_query_logs_table(conn):
+    # Databases created before query_logs existed are migrated by whoever opens them
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_logs (
+            query_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            query TEXT NOT NULL,
+            country TEXT DEFAULT NULL,
+            chunks_retrieved INTEGER NOT NULL,
+            is_refusal INTEGER NOT NULL,
+            top_section TEXT DEFAULT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
 def create_database():
     db_path = get_db_path()
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
     conn = sqlite3.connect(db_path)
+    # journal_mode=WAL is stored in the file, so every later connection inherits it;
+    # the rest are per-connection and only speed up this setup run
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -42,6 +64,17 @@ def create_database():
         )
     """)
 
+    create_query_logs_table(conn)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_text (
+            document_id TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            page_count INTEGER NOT NULL,
+            FOREIGN KEY (document_id) REFERENCES documents(document_id)
+        )
+    """)
+
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_documents_checksum ON documents(checksum)"
     )
@@ -52,7 +85,27 @@ def create_database():
         "CREATE INDEX IF NOT EXISTS idx_logs_document ON ingestion_logs(document_id)"
     )
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_level ON ingestion_logs(level)")
+    # Serve the accepted-and-unchunked and accepted-without-country scans from the index
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_status_id "
+        "ON documents(ingestion_status, document_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_status_country "
+        "ON documents(ingestion_status, country)"
+    )
+    # Partial and covering: the extractability check's pending scan reads only this
+    # index, which stays as small as the pending backlog
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_pending "
+        "ON documents(ingestion_status, document_id, filename, file_path) "
+        "WHERE ingestion_status = 'pending'"
+    )
+
+    conn.commit()
 
+    # Refresh planner statistics so the composite indexes get picked
+    cursor.execute("ANALYZE")
     conn.commit()
     conn.close()
 
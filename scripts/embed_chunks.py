@@ -1,55 +1,81 @@
+import os
 import sqlite3
-from qdrant_client import QdrantClient
-from qdrant_client.models import (
+import sys
+import uuid
+from pathlib import Path
+from typing import List, Tuple
+
+# OpenMP/MKL read these when torch loads, so they must be set before the import;
+# an explicit value in the environment still wins
+NUM_THREADS = int(os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1)))
+os.environ.setdefault("MKL_NUM_THREADS", str(NUM_THREADS))
+
+# E402: torch and the libraries that load it must come after the setup above
+import torch  # noqa: E402
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import (  # noqa: E402
+    Batch,
     Distance,
     VectorParams,
-    PointStruct,
     Filter,
     FieldCondition,
     MatchValue,
+    OptimizersConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
 )
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from pathlib import Path
-from typing import List, Dict, Tuple
-import uuid
+from sentence_transformers import SentenceTransformer  # noqa: E402
+
+# Points buffered across encode batches before each Qdrant upsert
+UPSERT_BATCH_SIZE = 1024
+
+# Qdrant's default (KB of vectors per segment), restored after the bulk load
+INDEXING_THRESHOLD = 20000
 
 
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
 
 
+def get_ingestion_marker_path():
+    # Its mtime tells running retrievers (backend/hybrid_retrieval.py) to refresh
+    return Path(__file__).parent.parent / "data" / "metadata" / "last_ingestion"
+
+
 def get_qdrant_client():
     client = QdrantClient(path=Path(__file__).parent.parent / "data" / "qdrant_storage")
     return client
 
 
+_LOG_BUFFER: List[tuple] = []
+
+
 def log_event(conn, document_id: str, level: str, message: str):
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
-        (document_id, level, message),
-    )
-    conn.commit()
+    # Buffered; written in one executemany by flush_logs after each Qdrant upsert
+    _LOG_BUFFER.append((document_id, level, message))
 
 
-def get_document_info(conn, document_id: str) -> Dict[str, any]:
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT country, disease FROM documents WHERE document_id = ?", (document_id,)
+def flush_logs(conn):
+    if not _LOG_BUFFER:
+        return
+
+    conn.executemany(
+        "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
+        _LOG_BUFFER,
     )
-    row = cursor.fetchone()
-    if row:
-        return {"country": row[0], "disease": row[1]}
-    return {"country": None, "disease": None}
+    conn.commit()
+    _LOG_BUFFER.clear()
 
 
 def get_all_chunks(conn) -> List[Tuple]:
     cursor = conn.cursor()
     cursor.execute(
         """
-        SELECT c.chunk_id, c.document_id, c.section, c.text, c.char_count
+        SELECT c.chunk_id, c.document_id, c.section, c.text, c.char_count,
+               d.country, d.disease
         FROM chunks c
+        LEFT JOIN documents d ON d.document_id = c.document_id
         ORDER BY c.chunk_id
         """
     )
@@ -70,13 +96,20 @@ def get_unchunked_from_qdrant(qdrant_client, conn) -> List[Tuple]:
         if not collection_exists:
             return all_chunks
 
+        # Page through every point id; a single scroll stops at its limit
         existing_chunk_ids = set()
-        scroll_result = qdrant_client.scroll(
-            collection_name=collection_name, limit=10000, with_payload=False
-        )
-
-        if scroll_result[0]:
-            existing_chunk_ids = set(point.id for point in scroll_result[0])
+        offset = None
+        while True:
+            points, offset = qdrant_client.scroll(
+                collection_name=collection_name,
+                limit=10000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            existing_chunk_ids.update(point.id for point in points)
+            if offset is None:
+                break
 
         unchunked = [
             chunk for chunk in all_chunks if chunk[0] not in existing_chunk_ids
@@ -98,96 +131,138 @@ def create_qdrant_collection(qdrant_client, vector_size: int):
     if not collection_exists:
         qdrant_client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+            # Vectors are L2-normalized at encode time, so dot product equals cosine
+            vectors_config=VectorParams(size=vector_size, distance=Distance.DOT),
+            # 0 disables HNSW building while the bulk load runs; see enable_indexing
             optimizers_config={"indexing_threshold": 0},
+            # int8 copies in RAM for the search pass; originals rescore the top hits
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8, quantile=0.99, always_ram=True
+                )
+            ),
         )
         print(f"Created Qdrant collection: {collection_name}")
 
     return collection_name
 
 
-def load_semantic_model():
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    return model
-
-
-def normalize_vector(vector: np.ndarray) -> np.ndarray:
-    norm = np.linalg.norm(vector)
-    if norm == 0:
-        return vector
-    return vector / norm
+def enable_indexing(qdrant_client, collection_name: str):
+    qdrant_client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+    )
 
 
-def process_chunk_batch(
+def upsert_points(
     qdrant_client,
     collection_name: str,
-    semantic_model,
-    chunks_batch: List[Tuple],
-    document_cache: Dict[str, Dict],
+    chunk_ids: List[str],
+    vectors: List[List[float]],
+    payloads: List[dict],
     conn,
-) -> Tuple[int, int]:
-    success_count = 0
-    error_count = 0
+) -> int:
+    # Columnar Batch: one request body without a PointStruct per chunk
+    try:
+        qdrant_client.upsert(
+            collection_name=collection_name,
+            points=Batch(ids=chunk_ids, vectors=vectors, payloads=payloads),
+        )
+    except Exception as e:
+        log_event(conn, None, "ERROR", f"Batch upsert failed: {str(e)}")
+        return len(chunk_ids)
+    return 0
 
-    chunk_ids = []
-    vectors = []
-    payloads = []
 
-    for chunk_id, document_id, section, text, char_count in chunks_batch:
-        try:
-            if document_id not in document_cache:
-                document_cache[document_id] = get_document_info(conn, document_id)
+def get_device() -> str:
+    if os.environ.get("EMBEDDING_DEVICE"):
+        return os.environ["EMBEDDING_DEVICE"]
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
 
-            doc_info = document_cache[document_id]
 
-            semantic_embedding = semantic_model.encode(text)
-            semantic_embedding = normalize_vector(semantic_embedding)
+def load_semantic_model():
+    if os.environ.get("EMBEDDING_BACKEND", "torch").lower() == "onnx":
+        # Same encoder and export the backend retriever embeds queries with
+        sys.path.append(str(Path(__file__).parent.parent / "backend"))
+        from onnx_encoder import load_onnx_encoder
 
-            chunk_ids.append(chunk_id)
-            vectors.append(semantic_embedding.tolist())
+        return load_onnx_encoder()
 
-            payload = {
-                "document_id": document_id,
-                "section": section,
-                "char_count": char_count,
-                "country": doc_info["country"],
-                "disease": doc_info["disease"],
-                "semantic_embedding_computed": True,
-            }
+    torch.set_num_threads(NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        # Only settable once, before any inter-op work has started
+        pass
 
-            payloads.append(payload)
-            success_count += 1
+    model = SentenceTransformer("all-MiniLM-L6-v2", device=get_device())
+    return model
 
-            log_event(
-                conn,
-                document_id,
-                "INFO",
-                f"Chunk {chunk_id}: semantic embedding computed, section={section}, chars={char_count}",
-            )
 
-        except Exception as e:
-            error_count += 1
+def process_chunk_batch(
+    semantic_model,
+    chunks_batch: List[Tuple],
+    conn,
+) -> Tuple[Tuple[List[str], List[List[float]], List[dict]], int]:
+    try:
+        # One forward pass for the whole batch; the model L2-normalizes in place
+        embeddings = semantic_model.encode(
+            [chunk[3] for chunk in chunks_batch],
+            batch_size=len(chunks_batch),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    except Exception as e:
+        for chunk_id, document_id, *_ in chunks_batch:
             log_event(
                 conn,
                 document_id,
                 "ERROR",
                 f"Chunk {chunk_id}: embedding failed - {str(e)}",
             )
+        return ([], [], []), len(chunks_batch)
 
-    if chunk_ids:
-        try:
-            points = [
-                PointStruct(id=chunk_id, vector=vector, payload=payload)
-                for chunk_id, vector, payload in zip(chunk_ids, vectors, payloads)
-            ]
-
-            qdrant_client.upsert(collection_name=collection_name, points=points)
-
-        except Exception as e:
-            error_count += len(chunk_ids)
-            log_event(conn, None, "ERROR", f"Batch upsert failed: {str(e)}")
+    chunk_ids = []
+    payloads = []
+    # One conversion for the whole (batch, dim) matrix instead of one per row;
+    # pydantic validates plain lists far faster than an ndarray
+    vectors = embeddings.tolist()
+    # Each row already carries its document's country and disease from the JOIN
+    for (
+        chunk_id,
+        document_id,
+        section,
+        text,
+        char_count,
+        country,
+        disease,
+    ) in chunks_batch:
+        payload = {
+            "document_id": document_id,
+            "section": section,
+            "char_count": char_count,
+            "text": text,
+            "country": country,
+            "disease": disease,
+            "semantic_embedding_computed": True,
+        }
+
+        chunk_ids.append(chunk_id)
+        payloads.append(payload)
+
+        log_event(
+            conn,
+            document_id,
+            "INFO",
+            f"Chunk {chunk_id}: semantic embedding computed, section={section}, chars={char_count}",
+        )
 
-    return success_count, error_count
+    return (chunk_ids, vectors, payloads), 0
 
 
 def run_embedding():
@@ -199,6 +274,8 @@ def run_embedding():
 
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
 
     qdrant_client = get_qdrant_client()
 
@@ -211,34 +288,79 @@ def run_embedding():
 
     if not unprocessed_chunks:
         log_event(conn, None, "INFO", "No chunks to embed (all already processed)")
+        flush_logs(conn)
         conn.close()
         return {"processed": 0, "errors": 0}
 
-    document_cache = {}
-    batch_size = 32
+    # Similar-length chunks share a batch so each forward pass pads less;
+    # points are upserted by chunk_id, so the processing order doesn't matter
+    unprocessed_chunks = sorted(unprocessed_chunks, key=lambda chunk: chunk[4])
+
+    # Accelerators need bigger batches to amortize kernel launches
+    on_accelerator = str(getattr(semantic_model, "device", "cpu")) != "cpu"
+    batch_size = 256 if on_accelerator else 128
 
     total_success = 0
     total_errors = 0
 
+    pending_ids = []
+    pending_vectors = []
+    pending_payloads = []
+
     for i in range(0, len(unprocessed_chunks), batch_size):
         batch = unprocessed_chunks[i : i + batch_size]
-        success, errors = process_chunk_batch(
-            qdrant_client, collection_name, semantic_model, batch, document_cache, conn
+        (chunk_ids, vectors, payloads), errors = process_chunk_batch(
+            semantic_model, batch, conn
         )
-        total_success += success
+        total_success += len(chunk_ids)
         total_errors += errors
+        pending_ids.extend(chunk_ids)
+        pending_vectors.extend(vectors)
+        pending_payloads.extend(payloads)
+
+        if len(pending_ids) >= UPSERT_BATCH_SIZE:
+            total_errors += upsert_points(
+                qdrant_client,
+                collection_name,
+                pending_ids,
+                pending_vectors,
+                pending_payloads,
+                conn,
+            )
+            pending_ids, pending_vectors, pending_payloads = [], [], []
+            flush_logs(conn)
+
+    if pending_ids:
+        total_errors += upsert_points(
+            qdrant_client,
+            collection_name,
+            pending_ids,
+            pending_vectors,
+            pending_payloads,
+            conn,
+        )
+
+    enable_indexing(qdrant_client, collection_name)
+
+    if total_success:
+        get_ingestion_marker_path().touch()
 
     summary_message = (
         f"Embedding completed: {total_success} chunks embedded, {total_errors} errors"
     )
     log_event(conn, None, "INFO", summary_message)
+    flush_logs(conn)
 
     conn.close()
 
     return {"processed": total_success, "errors": total_errors}
 
 
-if __name__ == "__main__":
+def main():
     results = run_embedding()
     print(f"Processed: {results['processed']}")
     print(f"Errors: {results['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -181,7 +181,10 @@ class HybridRetriever:
         conn = sqlite3.connect(get_db_path())
 
         try:
-            query_embedding = self.semantic_model.encode(query)
+            # The collection scores with dot product, which needs unit-length queries
+            query_embedding = self.semantic_model.encode(
+                query, normalize_embeddings=True
+            )
 
             filters = self._apply_filters(country)
 
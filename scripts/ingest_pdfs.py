@@ -1,7 +1,10 @@
+import os
 import sqlite3
 import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
 
 
 def get_db_path():
@@ -17,43 +20,45 @@ def get_pdfs_dir():
 
 
 def compute_checksum(file_path: str) -> str:
-    sha256_hash = hashlib.sha256()
+    # file_digest hashes large buffers in C (or the fd directly) instead of 4KB reads
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+_LOG_BUFFER: List[tuple] = []
 
 
 def log_event(conn, document_id: str, level: str, message: str):
-    cursor = conn.cursor()
-    cursor.execute(
+    # Buffered; written in one executemany by flush_logs at the end of the run
+    _LOG_BUFFER.append((document_id, level, message))
+
+
+def flush_logs(conn):
+    if not _LOG_BUFFER:
+        return
+
+    conn.executemany(
         "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
-        (document_id, level, message),
+        _LOG_BUFFER,
     )
     conn.commit()
+    _LOG_BUFFER.clear()
 
 
-def document_exists(conn, checksum: str) -> tuple[bool, str | None]:
+def get_existing_checksums(conn) -> dict[str, str]:
     cursor = conn.cursor()
-    cursor.execute("SELECT document_id FROM documents WHERE checksum = ?", (checksum,))
-    row = cursor.fetchone()
-    if row:
-        return True, row[0]
-    return False, None
+    cursor.execute("SELECT checksum, document_id FROM documents")
+    return dict(cursor.fetchall())
 
 
-def insert_document(
-    conn, document_id: str, filename: str, file_path: str, checksum: str
-):
-    cursor = conn.cursor()
-    cursor.execute(
+def insert_documents(conn, rows: List[tuple]):
+    conn.executemany(
         """
         INSERT INTO documents (document_id, filename, file_path, checksum, ingestion_status)
         VALUES (?, ?, ?, ?, 'pending')
         """,
-        (document_id, filename, file_path, checksum),
+        rows,
     )
-    conn.commit()
 
 
 def ingest_pdfs():
@@ -69,23 +74,42 @@ def ingest_pdfs():
 
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys = ON")
-
-    pdf_files = list(pdfs_dir.glob("*.pdf"))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    with os.scandir(pdfs_dir) as entries:
+        pdf_files = [
+            (entry.name, entry.path)
+            for entry in entries
+            if entry.name.endswith(".pdf") and entry.is_file()
+        ]
     if not pdf_files:
         log_event(conn, None, "INFO", "No PDF files found in directory")
+        flush_logs(conn)
+        conn.close()
         return
 
     ingested_count = 0
     skipped_count = 0
     error_count = 0
 
-    for pdf_path in pdf_files:
-        try:
-            filename = pdf_path.name
-            file_path = str(pdf_path)
+    # Hashing releases the GIL, so file reads overlap across threads; results are
+    # consumed in directory order so the first copy of a duplicate still wins
+    executor = ThreadPoolExecutor(max_workers=8)
+    checksum_futures = [
+        executor.submit(compute_checksum, file_path) for _, file_path in pdf_files
+    ]
+
+    # Duplicates are checked in memory, including against files earlier in this run
+    existing_checksums = get_existing_checksums(conn)
+    new_documents = []
 
+    for (filename, file_path), checksum_future in zip(
+        pdf_files, checksum_futures, strict=True
+    ):
+        try:
             try:
-                checksum = compute_checksum(file_path)
+                checksum = checksum_future.result()
             except Exception as e:
                 error_count += 1
                 log_event(
@@ -93,9 +117,9 @@ def ingest_pdfs():
                 )
                 continue
 
-            exists, existing_doc_id = document_exists(conn, checksum)
+            existing_doc_id = existing_checksums.get(checksum)
 
-            if exists:
+            if existing_doc_id is not None:
                 skipped_count += 1
                 log_event(
                     conn,
@@ -106,7 +130,8 @@ def ingest_pdfs():
                 continue
 
             document_id = str(uuid.uuid4())
-            insert_document(conn, document_id, filename, file_path, checksum)
+            new_documents.append((document_id, filename, file_path, checksum))
+            existing_checksums[checksum] = document_id
             ingested_count += 1
             log_event(
                 conn,
@@ -121,23 +146,33 @@ def ingest_pdfs():
                 conn,
                 None,
                 "ERROR",
-                f"Unexpected error processing {pdf_path.name}: {str(e)}",
+                f"Unexpected error processing {filename}: {str(e)}",
             )
 
+    executor.shutdown()
+
+    # Documents go in before the logs that reference them; flush_logs commits both
+    insert_documents(conn, new_documents)
+
     log_event(
         conn,
         None,
         "INFO",
         f"Ingestion completed: {ingested_count} new, {skipped_count} duplicates, {error_count} errors",
     )
+    flush_logs(conn)
 
     conn.close()
 
     return ingested_count, skipped_count, error_count
 
 
-if __name__ == "__main__":
+def main():
     ingested, skipped, errors = ingest_pdfs()
     print(f"New documents: {ingested}")
     print(f"Duplicates skipped: {skipped}")
     print(f"Errors: {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import os
+import threading
+from functools import lru_cache
 from groq import Groq
 from pathlib import Path
 import sys
 import sqlite3
 import json
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 import time
 
@@ -14,6 +16,16 @@ try:
 except ImportError:
     from scripts.hybrid_retrieval import HybridRetriever
 
+try:
+    from create_db import create_query_logs_table
+except ImportError:
+    from scripts.create_db import create_query_logs_table
+
+try:
+    from trace_pool import submit_trace
+except ImportError:
+    from scripts.trace_pool import submit_trace
+
 # Import LangSmith tracing
 try:
     from langsmith_tracing import RAGTracer
@@ -26,10 +38,51 @@ except ImportError:
     )
 
 
+def _run_trace(log_fn, *args, **kwargs):
+    try:
+        log_fn(*args, **kwargs)
+    except Exception:
+        pass
+
+
+_DB_LOCAL = threading.local()
+
+_retriever: Optional[HybridRetriever] = None
+_retriever_lock = threading.Lock()
+
+
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
 
 
+def get_connection() -> sqlite3.Connection:
+    # sqlite3 connections are bound to their creating thread, so keep one per thread
+    conn = getattr(_DB_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(get_db_path())
+        conn.execute("PRAGMA foreign_keys = ON")
+        create_query_logs_table(conn)
+        _DB_LOCAL.conn = conn
+    return conn
+
+
+def get_retriever() -> HybridRetriever:
+    """Process-wide HybridRetriever; loading its models dominates a cold query."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = HybridRetriever()
+        return _retriever
+
+
+@lru_cache(maxsize=1)
+def _get_groq_client() -> Groq:
+    api_key = os.environ.get(
+        "GROQ_API_KEY", "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"
+    )
+    return Groq(api_key=api_key)
+
+
 def log_event(conn, document_id: str, level: str, message: str):
     cursor = conn.cursor()
     cursor.execute(
@@ -39,7 +92,38 @@ def log_event(conn, document_id: str, level: str, message: str):
     conn.commit()
 
 
-def assemble_context(chunks: List[Dict]) -> str:
+def log_query_metrics(
+    conn,
+    query: str,
+    country: Optional[str],
+    chunks_retrieved: int,
+    is_refusal: bool,
+    top_section: Optional[str],
+):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO query_logs (query, country, chunks_retrieved, is_refusal, top_section)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (query, country, chunks_retrieved, int(is_refusal), top_section),
+    )
+    conn.commit()
+
+
+def assemble_context(conn, chunks: List[Dict]) -> str:
+    if not chunks:
+        return ""
+
+    chunk_ids = [chunk.get("chunk_id", "") for chunk in chunks]
+    placeholders = ",".join("?" * len(chunk_ids))
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})",
+        chunk_ids,
+    )
+    chunk_texts = dict(cursor.fetchall())
+
     context_parts = []
 
     for chunk in chunks:
@@ -50,13 +134,7 @@ def assemble_context(chunks: List[Dict]) -> str:
         country = payload.get("country", "unknown")
         document_id = payload.get("document_id", "")
 
-        conn = sqlite3.connect(get_db_path())
-        cursor = conn.cursor()
-        cursor.execute("SELECT text FROM chunks WHERE chunk_id = ?", (chunk_id,))
-        result = cursor.fetchone()
-        conn.close()
-
-        chunk_text = result[0] if result else ""
+        chunk_text = chunk_texts.get(chunk_id, "")
 
         formatted_chunk = (
             f"[Section: {section}] "
@@ -70,8 +148,7 @@ def assemble_context(chunks: List[Dict]) -> str:
     return "\n\n".join(context_parts)
 
 
-def generate_system_prompt() -> str:
-    return """You are a research assistant specializing in malaria research papers from Ghana and Nigeria.
+_SYSTEM_PROMPT = """You are a research assistant specializing in malaria research papers from Ghana and Nigeria.
 
 IMPORTANT INSTRUCTIONS:
 1. Answer the query STRICTLY based on the provided evidence from research papers.
@@ -85,10 +162,12 @@ IMPORTANT INSTRUCTIONS:
 
 Your role is to retrieve and synthesize information from the provided research context, not to provide medical advice."""
 
+# Shared by every request; the client only reads it
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
 
-def query_llm(client: Groq, user_query: str, context: str) -> str:
-    system_prompt = generate_system_prompt()
 
+def stream_llm(client: Groq, user_query: str, context: str) -> Iterator[str]:
+    """Yield answer text as Groq streams it, so callers can show the first tokens early."""
     user_prompt = f"""Context:
 {context}
 
@@ -99,14 +178,22 @@ Answer:"""
     completion = client.chat.completions.create(
         model="llama-3.3-70b-versatile",
         messages=[
-            {"role": "system", "content": system_prompt},
+            _SYSTEM_MESSAGE,
             {"role": "user", "content": user_prompt},
         ],
         max_tokens=1024,
         temperature=0.1,
+        stream=True,
     )
 
-    return completion.choices[0].message.content
+    for chunk in completion:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def query_llm(client: Groq, user_query: str, context: str) -> str:
+    return "".join(stream_llm(client, user_query, context))
 
 
 def rag_query(
@@ -119,8 +206,7 @@ def rag_query(
 
     from langsmith_tracing import RAGTracer
 
-    conn = sqlite3.connect(get_db_path())
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn = get_connection()
 
     tracer = None
     if LANGSMITH_AVAILABLE:
@@ -131,25 +217,20 @@ def rag_query(
 
     start_time = time.time()
 
-    retriever = HybridRetriever()
-    chunks = retriever.retrieve(
+    chunks = get_retriever().retrieve(
         query=user_query, country=country, K=top_k, log_retrieval=log_to_db
     )
 
     retrieval_time_ms = (time.time() - start_time) * 1000
 
     if tracer:
-        try:
-            tracer.log_retrieval(user_query, chunks, retrieval_time_ms)
-        except:
-            pass
+        submit_trace(
+            _run_trace, tracer.log_retrieval, user_query, chunks, retrieval_time_ms
+        )
 
-    context = assemble_context(chunks)
+    context = assemble_context(conn, chunks)
 
-    api_key = os.environ.get(
-        "GROQ_API_KEY", "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"
-    )
-    client = Groq(api_key=api_key)
+    client = _get_groq_client()
 
     llm_start = time.time()
     answer = query_llm(client, user_query, context)
@@ -160,19 +241,20 @@ def rag_query(
     total_latency_ms = (time.time() - start_time) * 1000
 
     if tracer:
-        try:
-            tracer.log_query(
-                query=user_query,
-                country=country,
-                top_k=top_k,
-                chunks_retrieved=len(chunks),
-                is_insufficient=is_insufficient,
-                latency_ms=total_latency_ms,
-                answer=answer
-            )
-            tracer.log_llm_call(user_query, context, answer, llm_latency_ms)
-        except:
-            pass
+        submit_trace(
+            _run_trace,
+            tracer.log_query,
+            query=user_query,
+            country=country,
+            top_k=top_k,
+            chunks_retrieved=len(chunks),
+            is_insufficient=is_insufficient,
+            latency_ms=total_latency_ms,
+            answer=answer,
+        )
+        submit_trace(
+            _run_trace, tracer.log_llm_call, user_query, context, answer, llm_latency_ms
+        )
 
     if log_to_db:
         filter_info = f"country={country}" if country else "none"
@@ -180,7 +262,7 @@ def rag_query(
 
         message = (
             f'LLM Query: "{user_query[:100]}...", '
-            f"Chunks retrieved: {len(chunks)}, '
+            f"Chunks retrieved: {len(chunks)}, "
             f"Filters: {filter_info}, "
             f"Refusal: {is_insufficient}"
         )
@@ -191,8 +273,14 @@ def rag_query(
             "INFO",
             message,
         )
-
-    conn.close()
+        log_query_metrics(
+            conn,
+            user_query,
+            country,
+            len(chunks),
+            is_insufficient,
+            chunks[0]["payload"].get("section") if chunks else None,
+        )
 
     response = {
         "query": user_query,
@@ -260,11 +348,9 @@ def main():
             print(response["answer"])
 
         print(f"\nTop Sources:")
+        chunks_by_id = {c["chunk_id"]: c for c in response["retrieved_chunks"]}
         for j, chunk_id in enumerate(response["top_chunk_ids"][:3], 1):
-            chunk = next(
-                (c for c in response["retrieved_chunks"] if c["chunk_id"] == chunk_id),
-                None,
-            )
+            chunk = chunks_by_id.get(chunk_id)
             if chunk:
                 payload = chunk.get("payload", {})
                 print(
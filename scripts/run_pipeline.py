@@ -1,15 +1,35 @@
+import contextlib
+import io
+import logging
+import os
 import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime
 from dataclasses import dataclass
-from enum import Enum
-import subprocess
+from enum import StrEnum
 import sys
 import json
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = PROJECT_ROOT / "data" / "metadata" / "documents.db"
+LOG_DIR = PROJECT_ROOT / "logs"
 
-class NodeStatus(Enum):
+# Per-node script output is rotated so verbose runs cannot fill the disk
+NODE_LOG_MAX_BYTES = 10 * 1024 * 1024
+NODE_LOG_BACKUPS = 3
+
+# Node functions import sibling scripts as the scripts package
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+class NodeStatus(StrEnum):
     PENDING = "pending"
     RUNNING = "running"
     SUCCESS = "success"
@@ -27,18 +47,101 @@ class NodeResult:
     timestamp: datetime
 
 
+def _preview_value(value: Any, n: int) -> Any:
+    # Containers are summarized by size so large results are never stringified
+    if isinstance(value, (list, tuple, dict, set)):
+        return f"<{type(value).__name__} of {len(value)}>"
+    if isinstance(value, str):
+        return value[:n]
+    return value
+
+
+def _safe_preview(data: Any, n: int = 500) -> str:
+    """Short repr of a node result without materializing its full string form."""
+    if isinstance(data, dict):
+        preview = {k: _preview_value(v, n) for k, v in islice(data.items(), 10)}
+        return repr(preview)[:n]
+    if isinstance(data, (list, tuple)):
+        preview = [_preview_value(v, n) for v in data[:3]]
+        return f"{preview!r} ({len(data)} items)"[:n]
+    if isinstance(data, str):
+        return data[:n]
+    return str(data)[:n]
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 1
+    backoff: bool = False
+
+
 class PipelineOrchestrator:
+    # Buffered ingestion_logs rows are written once this many have queued
+    LOG_FLUSH_SIZE = 50
+
+    # One SQL string for every flush, so sqlite3's statement cache reuses the plan
+    INSERT_LOG_SQL = (
+        "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)"
+    )
+
     def __init__(self):
         self.nodes: Dict[str, Callable] = {}
         self.edges: Dict[str, List[str]] = {}
-        self.db_path = (
-            Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
-        )
+        self.retry_policies: Dict[str, RetryPolicy] = {}
+        self.db_path = DB_PATH
         self.logs: List[Dict] = []
+        self._pending_logs: List[tuple] = []
+        # Sibling nodes are driven from parallel threads and share the log buffer
+        self._log_lock = threading.RLock()
+
+        # One autocommit connection for the orchestrator's lifetime; WAL keeps the
+        # nodes' own writer connections and this logger from blocking each other
+        self.conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.execute("PRAGMA cache_size=-20000")
+
+    def close(self):
+        """Flush buffered logs and close the orchestrator's database connection."""
+        self.flush_logs()
+        self.conn.close()
+
+    def flush_logs(self):
+        """Write buffered ingestion_logs rows in a single transaction."""
+        with self._log_lock:
+            if not self._pending_logs:
+                return
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(self.INSERT_LOG_SQL, self._pending_logs)
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            self._pending_logs.clear()
+
+    def register_node(
+        self,
+        name: str,
+        func: Callable,
+        retryable: bool = False,
+        max_attempts: int = 1,
+        backoff: bool = False,
+    ):
+        """Register a pipeline node.
 
-    def register_node(self, name: str, func: Callable):
-        """Register a pipeline node."""
+        Only retryable (idempotent) nodes are re-run on failure, up to max_attempts;
+        with backoff, attempt n waits 2**n seconds first.
+        """
         self.nodes[name] = func
+        self.retry_policies[name] = RetryPolicy(
+            max_attempts=max_attempts if retryable else 1, backoff=backoff
+        )
 
     def register_edge(self, from_node: str, to_node: str):
         """Register an edge between nodes."""
@@ -64,30 +167,38 @@ class PipelineOrchestrator:
             "execution_time": execution_time,
             "document_id": document_id,
             "query_id": query_id,
-            "data": str(data)[:500] if data else None,
+            "data": _safe_preview(data) if data else None,
             "error": error,
         }
-        self.logs.append(log_entry)
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO ingestion_logs (document_id, level, message)
-            VALUES (?, ?, ?)
-            """,
-            (
-                document_id or query_id or "orchestrator",
-                "INFO" if status == NodeStatus.SUCCESS else "ERROR",
-                f"Pipeline Node: {node_name}, Status: {status.value}, Time: {execution_time:.2f}s"
-                + (f", Error: {error}" if error else ""),
-            ),
+
+        # RUNNING only marks a start for in-memory consumers; the outcome is what
+        # gets persisted, so each node costs one ingestion_logs row
+        if status is NodeStatus.RUNNING:
+            with self._log_lock:
+                self.logs.append(log_entry)
+            return
+
+        row = (
+            document_id or query_id or "orchestrator",
+            "INFO" if status is NodeStatus.SUCCESS else "ERROR",
+            f"Pipeline Node: {node_name}, Status: {status.value}, Time: {execution_time:.2f}s"
+            + (f", Error: {error}" if error else ""),
         )
-        conn.commit()
-        conn.close()
 
-    def run_node(self, node_name: str, **kwargs) -> NodeResult:
-        """Execute a single node with retries."""
+        with self._log_lock:
+            self.logs.append(log_entry)
+            self._pending_logs.append(row)
+            if len(self._pending_logs) >= self.LOG_FLUSH_SIZE:
+                self.flush_logs()
+
+    def run_node(
+        self, node_name: str, _submit: Optional[Callable] = None, **kwargs
+    ) -> NodeResult:
+        """Execute a single node with retries.
+
+        With _submit (an executor's submit), the node function runs there instead of
+        in this process; logging and retries stay here.
+        """
         if node_name not in self.nodes:
             return NodeResult(
                 node_name=node_name,
@@ -98,13 +209,18 @@ class PipelineOrchestrator:
                 timestamp=datetime.now(),
             )
 
-        start_time = datetime.now()
+        # Monotonic, so clock adjustments mid-run cannot skew durations
+        start_time = time.perf_counter()
         func = self.nodes[node_name]
+        policy = self.retry_policies.get(node_name, RetryPolicy())
 
-        for attempt in range(3):
+        for attempt in range(policy.max_attempts):
             try:
-                result = func(**kwargs)
-                execution_time = (datetime.now() - start_time).total_seconds()
+                if _submit is None:
+                    result = func(**kwargs)
+                else:
+                    result = _submit(func, **kwargs).result()
+                execution_time = time.perf_counter() - start_time
 
                 self.log_execution(
                     node_name=node_name,
@@ -125,10 +241,12 @@ class PipelineOrchestrator:
                 )
 
             except Exception as e:
-                execution_time = (datetime.now() - start_time).total_seconds()
+                execution_time = time.perf_counter() - start_time
                 error_msg = str(e)
 
-                if attempt < 2:
+                if attempt < policy.max_attempts - 1:
+                    if policy.backoff:
+                        time.sleep(2**attempt)
                     continue
 
                 self.log_execution(
@@ -149,162 +267,170 @@ class PipelineOrchestrator:
                     timestamp=datetime.now(),
                 )
 
+    def _in_degrees(self, start_node: str) -> Dict[str, int]:
+        """Count each node's predecessors among the nodes reachable from start_node."""
+        in_degree = {start_node: 0}
+        stack = [start_node]
+        while stack:
+            node_name = stack.pop()
+            for successor in self.edges.get(node_name, []):
+                if successor not in in_degree:
+                    in_degree[successor] = 0
+                    stack.append(successor)
+                in_degree[successor] += 1
+        return in_degree
+
+    def _run_ready(self, ready: List[str], **kwargs) -> List[NodeResult]:
+        if len(ready) == 1:
+            return [self.run_node(ready[0], **kwargs)]
+
+        # Independent siblings run in separate processes: the in-process script nodes
+        # redirect stdout, which is process-wide, so threads alone would mix output
+        with ProcessPoolExecutor(
+            max_workers=min(len(ready), os.cpu_count() or 1)
+        ) as workers, ThreadPoolExecutor(max_workers=len(ready)) as drivers:
+            futures = [
+                drivers.submit(self.run_node, node_name, workers.submit, **kwargs)
+                for node_name in ready
+            ]
+            return [future.result() for future in futures]
+
     def execute_pipeline(self, start_node: str, **kwargs):
-        """Execute pipeline from start node."""
+        """Execute pipeline from start node.
+
+        A node runs once all of its predecessors have succeeded; nodes that become
+        ready together run in parallel. The first failure stops the pipeline.
+        """
         results = {}
-        visited = set()
-        queue = [start_node]
+        in_degree = self._in_degrees(start_node)
+        ready = [start_node]
+
+        # Logs stay buffered for the whole run and are written even if a node raises
+        try:
+            while ready:
+                ready = [node_name for node_name in ready if node_name in self.nodes]
+
+                for node_name in ready:
+                    self.log_execution(
+                        node_name=node_name,
+                        status=NodeStatus.RUNNING,
+                        data=f"Executing node {node_name}",
+                        document_id=kwargs.get("document_id"),
+                        query_id=kwargs.get("query_id"),
+                    )
+
+                next_ready = []
+                failed = False
+                for node_name, result in zip(
+                    ready, self._run_ready(ready, **kwargs), strict=True
+                ):
+                    results[node_name] = result
+
+                    # run_node has already logged the failure
+                    if result.status is NodeStatus.FAILURE:
+                        failed = True
+                        continue
+
+                    for successor in self.edges.get(node_name, []):
+                        in_degree[successor] -= 1
+                        if in_degree[successor] == 0:
+                            next_ready.append(successor)
+
+                if failed:
+                    break
+                ready = next_ready
+        finally:
+            self.flush_logs()
 
-        while queue:
-            node_name = queue.pop(0)
+        return results
 
-            if node_name in visited:
-                continue
 
-            if node_name not in self.nodes:
-                continue
+class _HandlerStream(io.TextIOBase):
+    """Text stream that hands every write to a logging handler."""
 
-            self.log_execution(
-                node_name=node_name,
-                status=NodeStatus.RUNNING,
-                data=f"Executing node {node_name}",
-                document_id=kwargs.get("document_id"),
-                query_id=kwargs.get("query_id"),
-            )
+    def __init__(self, handler: logging.Handler):
+        self.handler = handler
 
-            result = self.run_node(node_name, **kwargs)
-            results[node_name] = result
+    def writable(self) -> bool:
+        return True
 
-            if result.status == NodeStatus.FAILURE:
-                self.log_execution(
-                    node_name=node_name,
-                    status=NodeStatus.FAILURE,
-                    data=f"Pipeline stopped at {node_name}",
-                    document_id=kwargs.get("document_id"),
-                    query_id=kwargs.get("query_id"),
-                )
-                break
+    def write(self, text: str) -> int:
+        if text:
+            self.handler.handle(logging.makeLogRecord({"msg": text}))
+        return len(text)
 
-            visited.add(node_name)
 
-            if node_name in self.edges:
-                queue.extend(self.edges[node_name])
+def run_script_main(
+    main: Callable[[], Any], node_name: str, failure_message: str
+) -> Dict:
+    """Run a pipeline script's main() in this process, streaming what it prints
+    to logs/<node_name>.log instead of holding it in memory."""
+    LOG_DIR.mkdir(exist_ok=True)
+    log_path = LOG_DIR / f"{node_name}.log"
+    handler = RotatingFileHandler(
+        log_path,
+        maxBytes=NODE_LOG_MAX_BYTES,
+        backupCount=NODE_LOG_BACKUPS,
+        encoding="utf-8",
+    )
+    # print() already supplies the newlines
+    handler.terminator = ""
+    stream = _HandlerStream(handler)
 
-        return results
+    try:
+        with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+            main()
+    except Exception as e:
+        raise Exception(f"{failure_message}: {e}") from e
+    finally:
+        handler.close()
+
+    return {"log_path": str(log_path)}
 
 
 def node_pdf_ingestion(pdfs_dir: Path, **kwargs) -> Dict:
     """PDF Ingestion Node."""
-    import sys
-
-    sys.path.append(str(Path(__file__).parent.parent))
-
-    result = subprocess.run(
-        ["python", "scripts/ingest_pdfs.py"],
-        cwd=str(Path(__file__).parent.parent),
-        capture_output=True,
-        text=True,
-        timeout=600,
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Ingestion failed: {result.stderr}")
+    from scripts.ingest_pdfs import main
 
-    return {"stdout": result.stdout, "stderr": result.stderr}
+    return run_script_main(main, "pdf_ingestion", "Ingestion failed")
 
 
 def node_text_extraction(**kwargs) -> Dict:
     """Text Extraction & Country Attribution Node."""
-    import sys
-
-    sys.path.append(str(Path(__file__).parent.parent))
-
-    result = subprocess.run(
-        ["python", "scripts/text_extractability_check.py"],
-        cwd=str(Path(__file__).parent.parent),
-        capture_output=True,
-        text=True,
-        timeout=600,
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Text extraction failed: {result.stderr}")
+    from scripts.text_extractability_check import main
 
-    return {"stdout": result.stdout, "stderr": result.stderr}
+    return run_script_main(main, "text_extraction", "Text extraction failed")
 
 
 def node_country_attribution(**kwargs) -> Dict:
     """Country Attribution Node."""
-    import sys
+    from scripts.country_attribution import main
 
-    sys.path.append(str(Path(__file__).parent.parent))
-
-    result = subprocess.run(
-        ["python", "scripts/country_attribution.py"],
-        cwd=str(Path(__file__).parent.parent),
-        capture_output=True,
-        text=True,
-        timeout=600,
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Country attribution failed: {result.stderr}")
-
-    return {"stdout": result.stdout, "stderr": result.stderr}
+    return run_script_main(main, "country_attribution", "Country attribution failed")
 
 
 def node_chunking(**kwargs) -> Dict:
     """Chunking Node."""
-    import sys
+    from scripts.chunk_documents import main
 
-    sys.path.append(str(Path(__file__).parent.parent))
-
-    result = subprocess.run(
-        ["python", "scripts/chunk_documents.py"],
-        cwd=str(Path(__file__).parent.parent),
-        capture_output=True,
-        text=True,
-        timeout=1800,
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Chunking failed: {result.stderr}")
-
-    return {"stdout": result.stdout, "stderr": result.stderr}
+    return run_script_main(main, "chunking", "Chunking failed")
 
 
 def node_embeddings(**kwargs) -> Dict:
     """Embeddings Node."""
-    import sys
-
-    sys.path.append(str(Path(__file__).parent.parent))
+    from scripts.embed_chunks import main
 
-    result = subprocess.run(
-        ["python", "scripts/embed_chunks.py"],
-        cwd=str(Path(__file__).parent.parent),
-        capture_output=True,
-        text=True,
-        timeout=1800,
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Embeddings failed: {result.stderr}")
-
-    return {"stdout": result.stdout, "stderr": result.stderr}
+    return run_script_main(main, "embeddings", "Embeddings failed")
 
 
 def node_hybrid_retrieval(
     query: str, country: Optional[str] = None, top_k: int = 10, **kwargs
 ) -> Dict:
     """Hybrid Retrieval Node."""
-    import sys
-
-    sys.path.append(str(Path(__file__).parent.parent))
-
-    from scripts.hybrid_retrieval import HybridRetriever
+    # Shared with rag_query, so the query pipeline loads the models once per process
+    from scripts.llm_rag_query import get_retriever
 
-    retriever = HybridRetriever()
-    chunks = retriever.retrieve(
+    chunks = get_retriever().retrieve(
         query=query, country=country, K=top_k, log_retrieval=False
     )
 
@@ -321,10 +447,6 @@ def node_llm_rag(
     query: str, country: Optional[str] = None, top_k: int = 10, **kwargs
 ) -> Dict:
     """LLM RAG Query Node."""
-    import sys
-
-    sys.path.append(str(Path(__file__).parent.parent))
-
     from scripts.llm_rag_query import rag_query
 
     response = rag_query(
@@ -334,22 +456,19 @@ def node_llm_rag(
     return response
 
 
-def node_evaluation(**kwargs) -> Dict:
+def node_evaluation(conn: sqlite3.Connection, **kwargs) -> Dict:
     """Evaluation Node."""
-    conn = sqlite3.connect(
-        str(Path(__file__).parent.parent / "data" / "metadata" / "documents.db")
-    )
     cursor = conn.cursor()
 
+    # One scan: refusals are only ever recorded on "LLM Query:" log lines
     cursor.execute(
-        "SELECT COUNT(*) FROM ingestion_logs WHERE message LIKE 'LLM Query:%'"
-    )
-    total_queries = cursor.fetchone()[0]
-
-    cursor.execute(
-        "SELECT COUNT(*) FROM ingestion_logs WHERE message LIKE '%Refusal: True%'"
+        """
+        SELECT COUNT(*), COALESCE(SUM(message LIKE '%Refusal: True%'), 0)
+        FROM ingestion_logs
+        WHERE message LIKE 'LLM Query:%'
+        """
     )
-    insufficient_queries = cursor.fetchone()[0]
+    total_queries, insufficient_queries = cursor.fetchone()
 
     refusal_rate = (insufficient_queries / total_queries) if total_queries > 0 else 0
 
@@ -365,15 +484,21 @@ def node_evaluation(**kwargs) -> Dict:
 
 def build_ingestion_pipeline(orchestrator: PipelineOrchestrator):
     """Build the ingestion pipeline graph."""
-    orchestrator.register_node("pdf_ingestion", node_pdf_ingestion)
+    orchestrator.register_node(
+        "pdf_ingestion", node_pdf_ingestion, retryable=True, max_attempts=3
+    )
     orchestrator.register_node("text_extraction", node_text_extraction)
     orchestrator.register_node("country_attribution", node_country_attribution)
     orchestrator.register_node("chunking", node_chunking)
-    orchestrator.register_node("embeddings", node_embeddings)
+    # The first run may download the embedding model, so back off between attempts
+    orchestrator.register_node(
+        "embeddings", node_embeddings, retryable=True, max_attempts=3, backoff=True
+    )
 
+    # Country attribution only reads documents text extraction has accepted, so
+    # the two run in sequence rather than as parallel siblings
     orchestrator.register_edge("pdf_ingestion", "text_extraction")
-    orchestrator.register_edge("pdf_ingestion", "country_attribution")
-    orchestrator.register_edge("text_extraction", "chunking")
+    orchestrator.register_edge("text_extraction", "country_attribution")
     orchestrator.register_edge("country_attribution", "chunking")
     orchestrator.register_edge("chunking", "embeddings")
 
@@ -396,7 +521,7 @@ def run_ingestion_pipeline():
     orchestrator = PipelineOrchestrator()
     build_ingestion_pipeline(orchestrator)
 
-    pdfs_dir = Path(__file__).parent.parent / "data" / "raw" / "pfds"
+    pdfs_dir = PROJECT_ROOT / "data" / "raw" / "pfds"
 
     results = orchestrator.execute_pipeline(
         start_node="pdf_ingestion", pdfs_dir=pdfs_dir
@@ -407,12 +532,14 @@ def run_ingestion_pipeline():
     print("=" * 80)
 
     for node_name, result in results.items():
-        status_symbol = "✓" if result.status == NodeStatus.SUCCESS else "✗"
+        status_symbol = "✓" if result.status is NodeStatus.SUCCESS else "✗"
         print(f"{status_symbol} {node_name}: {result.status.value}")
         if result.error:
             print(f"   Error: {result.error}")
         print(f"   Time: {result.execution_time:.2f}s")
 
+    orchestrator.close()
+
     return results
 
 
@@ -437,11 +564,11 @@ def run_query_pipeline(query: str, country: Optional[str] = None, top_k: int = 1
     print(f"Top K: {top_k}")
 
     retrieval_result = results.get("hybrid_retrieval")
-    if retrieval_result and retrieval_result.status == NodeStatus.SUCCESS:
+    if retrieval_result and retrieval_result.status is NodeStatus.SUCCESS:
         print(f"\nChunks Retrieved: {retrieval_result.data.get('chunks_retrieved', 0)}")
 
     llm_result = results.get("llm_rag")
-    if llm_result and llm_result.status == NodeStatus.SUCCESS:
+    if llm_result and llm_result.status is NodeStatus.SUCCESS:
         answer = llm_result.data.get("answer", "")
         is_insufficient = llm_result.data.get("is_insufficient_evidence", False)
 
@@ -455,6 +582,8 @@ def run_query_pipeline(query: str, country: Optional[str] = None, top_k: int = 1
 
     print("\n" + "=" * 80)
 
+    orchestrator.close()
+
     return results
 
 
@@ -463,20 +592,24 @@ def run_evaluation_pipeline():
     orchestrator = PipelineOrchestrator()
     build_evaluation_pipeline(orchestrator)
 
-    results = orchestrator.execute_pipeline(start_node="evaluation")
+    results = orchestrator.execute_pipeline(
+        start_node="evaluation", conn=orchestrator.conn
+    )
 
     print("=" * 80)
     print("Evaluation Pipeline Results")
     print("=" * 80)
 
     eval_result = results.get("evaluation")
-    if eval_result and eval_result.status == NodeStatus.SUCCESS:
+    if eval_result and eval_result.status is NodeStatus.SUCCESS:
         data = eval_result.data
         print(f"Total Queries: {data.get('total_queries', 0)}")
         print(f"Sufficient Evidence: {data.get('sufficient_queries', 0)}")
         print(f"Insufficient Evidence: {data.get('insufficient_queries', 0)}")
         print(f"Refusal Rate: {data.get('refusal_rate', 0):.2%}")
 
+    orchestrator.close()
+
     return results
 
 
@@ -3,22 +3,32 @@ Simple LangSmith Tracer for Malaria RAG System
 Minimal dependencies approach for easy integration
 """
 
+import atexit
+import logging
 import os
+import queue
+import sys
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from datetime import datetime
 from pathlib import Path
+from dotenv import dotenv_values
 
 
-# Load .env file manually
+# Repeat calls reuse the first result instead of re-reading the file
+@lru_cache(maxsize=1)
 def load_env_file():
     env_path = Path(__file__).parent.parent / "backend" / ".env"
     if env_path.exists():
-        with open(env_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and "=" in line and not line.startswith("#"):
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip()
+        # Values in .env win over the environment, as before; bare keys are skipped
+        os.environ.update(
+            {
+                key: value
+                for key, value in dotenv_values(env_path).items()
+                if value is not None
+            }
+        )
         print(f"Loaded .env from: {env_path}")
         return True
     else:
@@ -30,6 +40,21 @@ def load_env_file():
 load_env_file()
 
 
+# Query traces go through a queue to a listener thread, so the request thread never
+# blocks on stdout; LANGSMITH_LOG_LEVEL=WARNING silences them
+logger = logging.getLogger("langsmith.trace")
+logger.setLevel(os.getenv("LANGSMITH_LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = QueueListener(_log_queue, _stdout_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger.addHandler(QueueHandler(_log_queue))
+
+
 def init_langsmith():
     """Initialize LangSmith tracing"""
     try:
@@ -53,28 +78,45 @@ def init_langsmith():
 
 def log_query_start(query: str, country: Optional[str], top_k: int):
     """Log start of query"""
-    print(f"[LangSmith] Query started: {query[:50]}...")
-    print(f"  Country: {country or 'All'}")
-    print(f"  Top-K: {top_k}")
-    print(f"  Time: {datetime.now().isoformat()}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "[LangSmith] Query started: %s...\n  Country: %s\n  Top-K: %s\n  Time: %s",
+        query[:50],
+        country or "All",
+        top_k,
+        datetime.now().isoformat(),
+    )
 
 
 def log_retrieval_results(num_chunks: int, time_ms: float, sections: list):
     """Log retrieval metrics"""
-    print(f"[LangSmith] Retrieval complete: {num_chunks} chunks in {time_ms:.2f}ms")
-    print(f"  Sections: {sections[:5]}")
-    if num_chunks > 0:
-        print(f"  Avg/chunk: {time_ms / num_chunks:.2f}ms")
-    else:
-        print("  No chunks")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    per_chunk = (
+        f"Avg/chunk: {time_ms / num_chunks:.2f}ms" if num_chunks > 0 else "No chunks"
+    )
+    logger.info(
+        "[LangSmith] Retrieval complete: %d chunks in %.2fms\n  Sections: %s\n  %s",
+        num_chunks,
+        time_ms,
+        sections[:5],
+        per_chunk,
+    )
 
 
 def log_llm_generation(answer: str, context_len: int, time_ms: float):
     """Log LLM generation metrics"""
-    print(f"[LangSmith] LLM generation: {time_ms:.2f}ms")
-    print(f"  Context length: {context_len} chars")
-    print(f"  Answer length: {len(answer)} chars")
-    print(f"  Answer preview: {answer[:100]}...")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "[LangSmith] LLM generation: %.2fms\n  Context length: %d chars\n"
+        "  Answer length: %d chars\n  Answer preview: %s...",
+        time_ms,
+        context_len,
+        len(answer),
+        answer[:100],
+    )
 
 
 def log_query_complete(
@@ -87,15 +129,21 @@ def log_query_complete(
     answer_length: int,
 ):
     """Log complete query metrics"""
-    print(f"\n[LangSmith] Query Complete:")
-    print(f"  Query: {query[:60]}...")
-    print(f"  Country: {country or 'All'}")
-    print(f"  Top-K: {top_k}")
-    print(f"  Chunks: {chunks_retrieved}")
-    print(f"  Insufficient Evidence: {is_insufficient}")
-    print(f"  Total Latency: {total_time_ms:.2f}ms")
-    print(f"  Answer Length: {answer_length} chars")
-    print(f"  Completed: {datetime.now().isoformat()}\n")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "\n[LangSmith] Query Complete:\n  Query: %s...\n  Country: %s\n  Top-K: %s\n"
+        "  Chunks: %s\n  Insufficient Evidence: %s\n  Total Latency: %.2fms\n"
+        "  Answer Length: %s chars\n  Completed: %s\n",
+        query[:60],
+        country or "All",
+        top_k,
+        chunks_retrieved,
+        is_insufficient,
+        total_time_ms,
+        answer_length,
+        datetime.now().isoformat(),
+    )
 
 
 def test_langsmith():
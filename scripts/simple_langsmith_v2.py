@@ -3,6 +3,7 @@ Simple LangSmith tracer for RAG system using only langsmith SDK
 """
 
 import os
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Optional, Dict, Any
 from pathlib import Path
@@ -13,6 +14,11 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent / "backend" / ".env"
 load_dotenv(env_path)
 
+try:
+    from trace_pool import submit_trace
+except ImportError:
+    from scripts.trace_pool import submit_trace
+
 
 class SimpleLangSmith:
     def __init__(self):
@@ -46,10 +52,32 @@ class SimpleLangSmith:
         is_insufficient: bool,
         latency_ms: float,
         answer: str,
-    ) -> Optional[str]:
+    ) -> Optional[Future]:
+        """Queue the run for LangSmith; the returned future resolves to its id"""
         if not self.enabled or not self.client:
             return None
 
+        return submit_trace(
+            self._create_run,
+            query,
+            country,
+            top_k,
+            chunks_retrieved,
+            is_insufficient,
+            latency_ms,
+            answer,
+        )
+
+    def _create_run(
+        self,
+        query: str,
+        country: Optional[str],
+        top_k: int,
+        chunks_retrieved: int,
+        is_insufficient: bool,
+        latency_ms: float,
+        answer: str,
+    ) -> Optional[str]:
         try:
             run = self.client.create_run(
                 name="rag_query",
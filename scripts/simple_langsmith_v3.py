@@ -3,36 +3,56 @@ Simple LangSmith tracer using @traceable decorator
 """
 
 import os
+from collections import deque
 from pathlib import Path
 from dotenv import load_dotenv
 from langsmith import traceable
+from sortedcontainers import SortedList
 
 # Load .env from backend directory
 env_path = Path(__file__).parent.parent / "backend" / ".env"
 load_dotenv(env_path)
 
-# Track latencies for percentile calculations
-latency_history = []
+try:
+    from trace_pool import submit_trace
+except ImportError:
+    from scripts.trace_pool import submit_trace
+
+
+# Percentiles cover the most recent queries only, so memory stays bounded
+LATENCY_WINDOW = 10000
+
+# Arrival order (to know which sample to evict) and the same samples kept sorted
+latency_history = deque(maxlen=LATENCY_WINDOW)
+sorted_latencies = SortedList()
+
+
+def record_latency(latency_ms: float):
+    """Add a sample to the window, evicting the oldest once it is full"""
+    if len(latency_history) == LATENCY_WINDOW:
+        oldest = latency_history[0]
+        sorted_latencies.remove(oldest)
+    latency_history.append(latency_ms)
+    sorted_latencies.add(latency_ms)
 
 
 def calculate_percentiles(latencies):
-    """Calculate p50, p90, p95, p99 percentiles"""
+    """Calculate p50, p90, p95, p99 percentiles from already-sorted latencies"""
     if not latencies:
         return {"p50_ms": 0, "p90_ms": 0, "p95_ms": 0, "p99_ms": 0}
 
-    sorted_latencies = sorted(latencies)
-    n = len(sorted_latencies)
+    n = len(latencies)
 
     def get_percentile(p):
         idx = int(n * p / 100)
-        return sorted_latencies[min(idx, n - 1)]
+        return latencies[min(idx, n - 1)]
 
     return {
         "p50_ms": round(get_percentile(50), 2),
         "p90_ms": round(get_percentile(90), 2),
         "p95_ms": round(get_percentile(95), 2),
         "p99_ms": round(get_percentile(99), 2),
-        "sample_count": len(latencies),
+        "sample_count": n,
     }
 
 
@@ -89,36 +109,9 @@ def trace_rag_query(
     return result
 
 
-def log_query(
-    query: str,
-    country: str,
-    top_k: int,
-    chunks_retrieved: int,
-    is_insufficient: bool,
-    latency_ms: float,
-    answer: str,
-):
-    """Log a RAG query to LangSmith with percentiles"""
-    if not LANGSMITH_ENABLED:
-        return None
-
+def _trace_query(query: str, percentiles: dict, **kwargs) -> dict:
     try:
-        # Track latency
-        latency_history.append(latency_ms)
-
-        # Calculate percentiles
-        percentiles = calculate_percentiles(latency_history)
-
-        result = trace_rag_query(
-            query=query,
-            country=country,
-            top_k=top_k,
-            chunks_retrieved=chunks_retrieved,
-            is_insufficient=is_insufficient,
-            latency_ms=latency_ms,
-            answer=answer,
-            percentiles=percentiles,
-        )
+        result = trace_rag_query(query=query, percentiles=percentiles, **kwargs)
 
         print(f"[LangSmith] Query traced: {query[:50]}...")
         if percentiles["p50_ms"] > 0:
@@ -130,3 +123,39 @@ def log_query(
     except Exception as e:
         print(f"[LangSmith] Failed to trace query: {e}")
         return None
+
+
+def log_query(
+    query: str,
+    country: str,
+    top_k: int,
+    chunks_retrieved: int,
+    is_insufficient: bool,
+    latency_ms: float,
+    answer: str,
+):
+    """Log a RAG query to LangSmith with percentiles.
+
+    Percentiles are computed here; the trace itself is queued and the returned
+    future resolves to the traced result.
+    """
+    if not LANGSMITH_ENABLED:
+        return None
+
+    # Track latency
+    record_latency(latency_ms)
+
+    # Calculate percentiles
+    percentiles = calculate_percentiles(sorted_latencies)
+
+    return submit_trace(
+        _trace_query,
+        query=query,
+        country=country,
+        top_k=top_k,
+        chunks_retrieved=chunks_retrieved,
+        is_insufficient=is_insufficient,
+        latency_ms=latency_ms,
+        answer=answer,
+        percentiles=percentiles,
+    )
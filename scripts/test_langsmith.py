@@ -4,7 +4,7 @@ print("Testing LangSmith tracer...")
 print(f"Enabled: {tracer.enabled}")
 
 if tracer.enabled:
-    run_id = tracer.log_query(
+    future = tracer.log_query(
         query="Test query about malaria treatment",
         country="Ghana",
         top_k=5,
@@ -13,6 +13,7 @@ if tracer.enabled:
         latency_ms=1500.5,
         answer="This is a test answer about malaria treatment in Ghana using ACT therapy.",
     )
+    run_id = future.result() if future else None
 
     if run_id:
         print(f"✓ Successfully logged test run: {run_id}")
@@ -11,8 +11,10 @@ test_cases = [
     (3200, "very slow query"),
 ]
 
+# log_query only queues the trace, so all cases are in flight before waiting on any
+futures = []
 for latency_ms, query_desc in test_cases:
-    result = log_query(
+    future = log_query(
         query=f"Test query about malaria treatment - {query_desc}",
         country="Ghana",
         top_k=5,
@@ -21,6 +23,11 @@ for latency_ms, query_desc in test_cases:
         latency_ms=latency_ms,
         answer="This is a test answer about malaria treatment in Ghana using ACT therapy.",
     )
+    futures.append((future, latency_ms, query_desc))
+
+for future, latency_ms, query_desc in futures:
+    if future is not None:
+        future.result()
     print(f"Logged: {query_desc} ({latency_ms}ms)")
 
 print("\nCheck LangSmith dashboard: https://smith.langchain.com/")
@@ -1,13 +1,33 @@
+import os
 import sqlite3
 import fitz
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional
 
+# Plain-text extraction with image and whitespace handling off; ligatures are kept
+# so each one still counts as a single character, as with the default flags
+TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_PRESERVE_LIGATURES
 
+# Acceptance thresholds shared by classify_document and the early exit in
+# extract_text_metrics
+ACCEPT_MIN_TOTAL_CHARS = 3000
+ACCEPT_MIN_AVG_CHARS = 300
+ACCEPT_MAX_EMPTY_RATIO = 0.2
+
+# Longer documents are rejected before any text is extracted
+MAX_PAGES = int(os.environ.get("EXTRACT_MAX_PAGES", "2000"))
+
+
+@lru_cache(maxsize=1)
 def get_db_path():
     return Path(__file__).parent.parent / "data" / "metadata" / "documents.db"
 
 
+@lru_cache(maxsize=1)
 def get_pdfs_dir():
+    # Resolved once per process rather than stat-ing "pfds" on every call
     base_dir = Path(__file__).parent.parent / "data" / "raw"
     pdfs_dir = base_dir / "pfds"
     if not pdfs_dir.exists():
@@ -15,32 +35,56 @@ def get_pdfs_dir():
     return pdfs_dir
 
 
+# Below this many documents, worker start-up costs more than parallel parsing saves
+MIN_PROCESS_POOL_DOCS = 8
+
+# Documents whose status updates and logs share one commit
+COMMIT_EVERY = 50
+
+_LOG_BUFFER: List[tuple] = []
+_STATUS_BUFFER: List[tuple] = []
+
+
 def log_event(conn, document_id: str, level: str, message: str):
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
-        (document_id, level, message),
-    )
-    conn.commit()
+    # Buffered; written in one executemany by flush_logs every COMMIT_EVERY documents
+    _LOG_BUFFER.append((document_id, level, message))
+
+
+def flush_logs(conn):
+    """Write buffered status updates and logs in one transaction."""
+    if not _STATUS_BUFFER and not _LOG_BUFFER:
+        return
+
+    # The connection is in autocommit mode, so the transaction is explicit
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "UPDATE documents SET ingestion_status = ?, rejection_reason = ? WHERE document_id = ?",
+            _STATUS_BUFFER,
+        )
+        conn.executemany(
+            "INSERT INTO ingestion_logs (document_id, level, message) VALUES (?, ?, ?)",
+            _LOG_BUFFER,
+        )
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    _STATUS_BUFFER.clear()
+    _LOG_BUFFER.clear()
 
 
 def get_pending_documents(conn):
-    cursor = conn.cursor()
-    cursor.execute(
+    return conn.execute(
         "SELECT document_id, filename, file_path FROM documents WHERE ingestion_status = 'pending'"
-    )
-    return cursor.fetchall()
+    ).fetchall()
 
 
 def update_document_status(
     conn, document_id: str, status: str, rejection_reason: str = None
 ):
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE documents SET ingestion_status = ?, rejection_reason = ? WHERE document_id = ?",
-        (status, rejection_reason, document_id),
-    )
-    conn.commit()
+    # Buffered like log_event and written by flush_logs
+    _STATUS_BUFFER.append((status, rejection_reason, document_id))
 
 
 def extract_text_metrics(pdf_path: str) -> dict:
@@ -51,10 +95,13 @@ def extract_text_metrics(pdf_path: str) -> dict:
         "empty_page_ratio": 0,
         "extraction_success": False,
         "error": None,
+        "pages_scanned": 0,
+        "early_terminated": False,
     }
 
     try:
-        doc = fitz.open(pdf_path)
+        # check_pdf_file has already seen the %PDF marker, so skip format detection
+        doc = fitz.open(pdf_path, filetype="pdf")
         page_count = len(doc)
         metrics["page_count"] = page_count
 
@@ -62,19 +109,48 @@ def extract_text_metrics(pdf_path: str) -> dict:
             doc.close()
             return metrics
 
-        all_text = []
+        # Without the password every page extracts as empty, so don't read them
+        if doc.needs_pass:
+            doc.close()
+            metrics["error"] = "Encrypted PDF requires a password"
+            return metrics
+
+        if page_count > MAX_PAGES:
+            doc.close()
+            metrics["error"] = f"Too many pages: {page_count} (> {MAX_PAGES})"
+            return metrics
+
+        # Only the length is needed, so page text is never accumulated
+        total_chars = 0
         empty_pages = 0
+        pages_scanned = 0
+
+        # Acceptance is certain once the text already clears the total and average
+        # minimums and the empty-page limit holds even if every remaining page is
+        # empty; the partial metrics then still classify as accepted
+        accept_chars = max(ACCEPT_MIN_TOTAL_CHARS, ACCEPT_MIN_AVG_CHARS * page_count)
+        max_empty_pages = ACCEPT_MAX_EMPTY_RATIO * page_count
 
         for page in doc:
-            text = page.get_text()
-            all_text.append(text)
-            if not text.strip():
+            text = page.get_text("text", flags=TEXT_FLAGS)
+            total_chars += len(text)
+            if not text or text.isspace():
                 empty_pages += 1
-
-        total_text = "".join(all_text)
-        metrics["total_characters"] = len(total_text)
+            pages_scanned += 1
+
+            remaining_pages = page_count - pages_scanned
+            if (
+                remaining_pages
+                and total_chars >= accept_chars
+                and empty_pages + remaining_pages <= max_empty_pages
+            ):
+                metrics["early_terminated"] = True
+                break
+
+        metrics["pages_scanned"] = pages_scanned
+        metrics["total_characters"] = total_chars
         metrics["avg_chars_per_page"] = (
-            len(total_text) / page_count if page_count > 0 else 0
+            total_chars / page_count if page_count > 0 else 0
         )
         metrics["empty_page_ratio"] = empty_pages / page_count if page_count > 0 else 0
         metrics["extraction_success"] = True
@@ -104,7 +180,11 @@ def classify_document(metrics: dict) -> tuple[str, str]:
             reason = f"Insufficient text: {total_chars} characters (< 500)"
         return "rejected", reason
 
-    if total_chars >= 3000 and avg_chars >= 300 and empty_ratio <= 0.2:
+    if (
+        total_chars >= ACCEPT_MIN_TOTAL_CHARS
+        and avg_chars >= ACCEPT_MIN_AVG_CHARS
+        and empty_ratio <= ACCEPT_MAX_EMPTY_RATIO
+    ):
         return "accepted", None
 
     if total_chars < 1500 and page_count >= 3 and extraction_success:
@@ -114,22 +194,30 @@ def classify_document(metrics: dict) -> tuple[str, str]:
     return "rejected", reason
 
 
-def process_document(
-    conn, document_id: str, filename: str, file_path: str, pdfs_dir: Path
-) -> dict:
-    full_path = (
-        pdfs_dir / Path(file_path).name
-        if not Path(file_path).is_absolute()
-        else Path(file_path)
-    )
+def resolve_pdf_path(file_path: str, pdfs_dir: str) -> str:
+    # os.path on plain strings; no Path objects are built per document
+    if os.path.isabs(file_path):
+        return file_path
+    return os.path.join(pdfs_dir, os.path.basename(file_path))
+
+
+def check_pdf_file(full_path: str) -> Optional[str]:
+    """Rejection reason for files MuPDF would only fail on, from one small read."""
+    # Size alone is not checked: valid single-page PDFs can be a few hundred bytes.
+    # The header may follow a little leading junk, which MuPDF tolerates
+    try:
+        with open(full_path, "rb") as f:
+            head = f.read(1024)
+    except FileNotFoundError:
+        return "File not found"
+
+    if b"%PDF" not in head:
+        return "Not a PDF file (no %PDF header)"
 
-    if not full_path.exists():
-        log_event(conn, document_id, "ERROR", f"File not found: {filename}")
-        update_document_status(conn, document_id, "rejected", "File not found")
-        return {"status": "rejected", "error": "file_not_found"}
+    return None
 
-    metrics = extract_text_metrics(str(full_path))
 
+def process_document(conn, document_id: str, filename: str, metrics: dict) -> dict:
     if not metrics["extraction_success"]:
         log_event(
             conn,
@@ -150,14 +238,20 @@ def process_document(
         else ("WARNING" if rejection_reason == "needs_ocr" else "ERROR")
     )
 
+    # Optional parts are resolved first so the message is built in one f-string
+    reason = f", Reason: {rejection_reason}" if rejection_reason else ""
+    stopped = (
+        f", Stopped after {metrics['pages_scanned']} pages"
+        if metrics["early_terminated"]
+        else ""
+    )
     message = (
         f"File: {filename}, "
         f"Pages: {metrics['page_count']}, "
         f"Total chars: {metrics['total_characters']}, "
         f"Avg chars/page: {metrics['avg_chars_per_page']:.1f}, "
         f"Empty page ratio: {metrics['empty_page_ratio']:.2f}, "
-        f"Decision: {status}"
-        + (f", Reason: {rejection_reason}" if rejection_reason else "")
+        f"Decision: {status}{reason}{stopped}"
     )
 
     log_event(conn, document_id, level, message)
@@ -166,6 +260,29 @@ def process_document(
     return {"status": status, "metrics": metrics, "rejection_reason": rejection_reason}
 
 
+def reject_on_processing_error(conn, document_id: str, e: Exception):
+    log_event(conn, document_id, "ERROR", f"Processing failed: {str(e)}")
+    update_document_status(conn, document_id, "rejected", f"Processing error: {str(e)}")
+
+
+def count_result(results: dict, result: dict):
+    if result["status"] == "accepted":
+        results["accepted"] += 1
+    elif result.get("rejection_reason") == "needs_ocr":
+        results["needs_ocr"] += 1
+        results["rejected"] += 1
+    else:
+        results["rejected"] += 1
+
+
+def metrics_executor(doc_count: int) -> Executor:
+    workers = min(doc_count, os.cpu_count() or 1)
+    if doc_count < MIN_PROCESS_POOL_DOCS or workers == 1:
+        # MuPDF is not thread-safe, so small batches use one thread, not several
+        return ThreadPoolExecutor(max_workers=1)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
 def run_extractability_check():
     db_path = get_db_path()
     if not db_path.exists():
@@ -173,39 +290,65 @@ def run_extractability_check():
             f"Database not found at {db_path}. Run create_db.py first."
         )
 
-    conn = sqlite3.connect(db_path)
+    # No implicit transactions; flush_logs issues BEGIN/COMMIT around each batch
+    conn = sqlite3.connect(db_path, isolation_level=None)
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    # Other pipeline stages may hold the write lock briefly
+    conn.execute("PRAGMA busy_timeout=5000")
 
     pending_docs = get_pending_documents(conn)
 
     if not pending_docs:
         log_event(conn, None, "INFO", "No pending documents found")
+        flush_logs(conn)
+        conn.close()
         return {"accepted": 0, "rejected": 0, "needs_ocr": 0}
 
-    pdfs_dir = get_pdfs_dir()
+    pdfs_dir = str(get_pdfs_dir())
 
     results = {"accepted": 0, "rejected": 0, "needs_ocr": 0}
 
+    # Missing and non-PDF files are rejected up front; the rest are parsed below
+    to_extract = []
     for document_id, filename, file_path in pending_docs:
         try:
-            result = process_document(conn, document_id, filename, file_path, pdfs_dir)
-            status = result["status"]
-
-            if status == "accepted":
-                results["accepted"] += 1
-            elif result.get("rejection_reason") == "needs_ocr":
-                results["needs_ocr"] += 1
-                results["rejected"] += 1
-            else:
+            full_path = resolve_pdf_path(file_path, pdfs_dir)
+            file_error = check_pdf_file(full_path)
+            if file_error:
+                log_event(conn, document_id, "ERROR", f"{file_error}: {filename}")
+                update_document_status(conn, document_id, "rejected", file_error)
                 results["rejected"] += 1
-
+                continue
+            to_extract.append((document_id, filename, full_path))
         except Exception as e:
-            log_event(conn, document_id, "ERROR", f"Processing failed: {str(e)}")
-            update_document_status(
-                conn, document_id, "rejected", f"Processing error: {str(e)}"
-            )
+            reject_on_processing_error(conn, document_id, e)
             results["rejected"] += 1
 
+    # PDF parsing is CPU-bound and independent per file, so larger batches run in
+    # worker processes; the sqlite connection stays in this process for all writes
+    with metrics_executor(len(to_extract)) as executor:
+        futures = [
+            executor.submit(extract_text_metrics, full_path)
+            for _, _, full_path in to_extract
+        ]
+
+        for n, ((document_id, filename, _), future) in enumerate(
+            zip(to_extract, futures, strict=True), 1
+        ):
+            try:
+                result = process_document(conn, document_id, filename, future.result())
+                count_result(results, result)
+            except Exception as e:
+                reject_on_processing_error(conn, document_id, e)
+                results["rejected"] += 1
+
+            if n % COMMIT_EVERY == 0:
+                flush_logs(conn)
+
     summary_message = (
         f"Extractability check completed: "
         f"{results['accepted']} accepted, "
@@ -213,14 +356,19 @@ def run_extractability_check():
         f"{results['rejected'] - results['needs_ocr']} rejected"
     )
     log_event(conn, None, "INFO", summary_message)
+    flush_logs(conn)
 
     conn.close()
 
     return results
 
 
-if __name__ == "__main__":
+def main():
     results = run_extractability_check()
     print(f"Accepted: {results['accepted']}")
     print(f"Needs OCR: {results['needs_ocr']}")
     print(f"Rejected: {results['rejected'] - results['needs_ocr']}")
+
+
+if __name__ == "__main__":
+    main()
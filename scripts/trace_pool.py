@@ -0,0 +1,23 @@
+"""
+Background pool for LangSmith tracing calls, shared by the tracers and rag_query
+"""
+
+import atexit
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Tracing is a network round trip that only feeds monitoring, so it runs off the
+# query path; shutdown on exit waits for queued traces instead of dropping them
+_TRACE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="langsmith")
+atexit.register(_TRACE_POOL.shutdown, wait=True)
+
+# If LangSmith falls behind, the oldest queued traces are cancelled to bound the backlog
+_pending_traces = deque(maxlen=256)
+
+
+def submit_trace(fn, *args, **kwargs) -> Future:
+    if len(_pending_traces) == _pending_traces.maxlen:
+        _pending_traces[0].cancel()
+    future = _TRACE_POOL.submit(fn, *args, **kwargs)
+    _pending_traces.append(future)
+    return future